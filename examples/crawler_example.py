@@ -0,0 +1,39 @@
+from jdatetime import date as jdate
+
+from tsetmc_api.crawler import Crawler, CrawlSection
+
+
+def make_crawler() -> Crawler:
+	# دریافت تاریخچه‌ی معاملات و قیمت‌ها برای چند نماد در یک بازه
+	return Crawler(
+		symbol_ids=['14079693677610396', '35700344742885862'],
+		start_date=jdate(1402, 1, 1),
+		end_date=jdate(1402, 3, 31),
+		store_path='crawl_data',
+		checkpoint_path='crawl_checkpoint.jsonl',
+		sections=[CrawlSection.TRADES_DATA, CrawlSection.PRICE_DATA],
+		concurrency=8,
+	)
+
+
+def method_sync():
+	# اجرای دوباره بعد از توقف، از همان‌جا ادامه می‌دهد
+	result = make_crawler().crawl()
+	print('crawl result: \n\t', result)
+
+
+async def method_async():
+	# اجرای دوباره بعد از توقف، از همان‌جا ادامه می‌دهد
+	result = await make_crawler().aio_crawl()
+	print('crawl result: \n\t', result)
+
+
+if __name__ == '__main__':
+	print('RunMode: Sync')
+	method_sync()
+	
+	print('RunMode: Async')
+	
+	from asyncio import run
+	
+	run(method_async())
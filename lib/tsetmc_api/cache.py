@@ -0,0 +1,239 @@
+import asyncio
+from collections import OrderedDict
+from threading import Lock, Thread
+from time import monotonic
+from urllib.parse import urlencode
+
+# url (with sorted query) substring -> (ttl, stale while revalidate window) in seconds, for endpoints that change at
+# most a few times a day
+DEFAULT_TTLS = {
+    'StaticData/GetStaticData': (24 * 3600, 24 * 3600),
+    'InstValue.aspx': (3600, 24 * 3600),
+    'Partree=15131M': (24 * 3600, 7 * 24 * 3600),
+    'MarketData/GetStaticThreshold': (3600, 24 * 3600),
+    'ClosingPriceAll.aspx': (3600, 24 * 3600),
+}
+
+
+def get_request_key(method: str, url: str, params: dict = None) -> str:
+    key = f'{method.upper()} {url}'
+    if params:
+        key += ('&' if '?' in url else '?') + urlencode(sorted(params.items()))
+    return key
+
+
+class ResponseCache:
+    """
+    in memory lru cache of responses with a ttl per endpoint (see DEFAULT_TTLS), a response older than its ttl but
+    still in its stale window is returned right away while a fresh one is fetched in the background
+    """
+
+    def __init__(self, ttls: dict[str, tuple[float, float]] = None, max_entries: int = 256):
+        self.ttls = {pattern.lower(): ttl for pattern, ttl in (DEFAULT_TTLS if ttls is None else ttls).items()}
+        self.max_entries = max_entries
+        self.stats = {'hits': 0, 'stale_hits': 0, 'misses': 0}
+
+        # key -> (response, fetch time)
+        self._entries: OrderedDict[str, tuple[object, float]] = OrderedDict()
+        self._refreshing = set()
+        self._background_tasks = set()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_ttl(self, key: str) -> tuple[float, float] | None:
+        lower_key = key.lower()
+        for pattern, ttl in self.ttls.items():
+            if pattern in lower_key:
+                return ttl
+        return None
+
+    def get(self, key: str, fetch):
+        """
+        returns the cached response for key, fetch() is called for a missing or expired response (and in a background
+        thread for a stale one)
+        """
+
+        ttl = self.get_ttl(key=key)
+        if ttl is None:
+            return fetch()
+
+        response, is_stale = self._lookup(key=key, ttl=ttl)
+        if response is not None:
+            if is_stale and self._start_refresh(key=key):
+                Thread(target=self._refresh, args=(key, fetch), daemon=True).start()
+            return response
+
+        response = fetch()
+        self._put(key=key, response=response)
+        return response
+
+    async def aio_get(self, key: str, fetch):
+        """
+        same as get for coroutine fetchers, stale responses are refreshed in a background task
+        """
+
+        ttl = self.get_ttl(key=key)
+        if ttl is None:
+            return await fetch()
+
+        response, is_stale = self._lookup(key=key, ttl=ttl)
+        if response is not None:
+            if is_stale and self._start_refresh(key=key):
+                task = asyncio.create_task(self._aio_refresh(key=key, fetch=fetch))
+                self._background_tasks.add(task)
+                task.add_done_callback(self._background_tasks.discard)
+            return response
+
+        response = await fetch()
+        self._put(key=key, response=response)
+        return response
+
+    def _lookup(self, key: str, ttl: tuple[float, float]) -> tuple[object | None, bool]:
+        fresh_ttl, stale_ttl = ttl
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                response, fetched_at = entry
+                age = monotonic() - fetched_at
+                if age < fresh_ttl:
+                    self._entries.move_to_end(key)
+                    self.stats['hits'] += 1
+                    return response, False
+                if age < fresh_ttl + stale_ttl:
+                    self._entries.move_to_end(key)
+                    self.stats['stale_hits'] += 1
+                    return response, True
+                del self._entries[key]
+
+            self.stats['misses'] += 1
+            return None, False
+
+    def _put(self, key: str, response):
+        with self._lock:
+            self._entries[key] = (response, monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _start_refresh(self, key: str) -> bool:
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    def _refresh(self, key: str, fetch):
+        try:
+            self._put(key=key, response=fetch())
+        except Exception:
+            # the stale response keeps being served until its window ends or a refresh succeeds
+            pass
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    async def _aio_refresh(self, key: str, fetch):
+        try:
+            self._put(key=key, response=await fetch())
+        except Exception:
+            pass
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+
+class ValidatorCache:
+    """
+    keeps ETag/Last-Modified validators (and the response) of GET requests so the next request for the same url is
+    conditional and a 304 reuses the old response instead of downloading the body again, stats record bytes saved by
+    304s and by compression (which requests and aiohttp already negotiate on their own)
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self.stats = {
+            'requests': 0,
+            'not_modified': 0,
+            'bytes_received': 0,
+            'bytes_saved_by_not_modified': 0,
+            'bytes_saved_by_compression': 0,
+        }
+
+        # key -> (etag, last modified, response, body size)
+        self._entries: OrderedDict[str, tuple[str | None, str | None, object, int]] = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_request_headers(self, key: str, headers: dict = None) -> dict:
+        """
+        returns a copy of headers with validators of the cached response of key (if any)
+        """
+
+        headers = dict(headers or {})
+
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None:
+            etag, last_modified, _, _ = entry
+            if etag is not None:
+                headers['If-None-Match'] = etag
+            if last_modified is not None:
+                headers['If-Modified-Since'] = last_modified
+
+        return headers
+
+    def get_not_modified_response(self, key: str):
+        """
+        returns the cached response of key after a 304 (None if it was evicted meanwhile)
+        """
+
+        with self._lock:
+            entry = self._entries.get(key)
+            self.stats['requests'] += 1
+            if entry is None:
+                return None
+
+            self._entries.move_to_end(key)
+            self.stats['not_modified'] += 1
+            self.stats['bytes_saved_by_not_modified'] += entry[3]
+            return entry[2]
+
+    def store(self, key: str, response, body_size: int):
+        """
+        records a full response and keeps it if it has validators
+        """
+
+        headers = response.headers
+        wire_size = headers.get('Content-Length')
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+
+        with self._lock:
+            self.stats['requests'] += 1
+            if wire_size is not None and wire_size.isdigit():
+                self.stats['bytes_received'] += int(wire_size)
+                if headers.get('Content-Encoding'):
+                    self.stats['bytes_saved_by_compression'] += max(body_size - int(wire_size), 0)
+            else:
+                self.stats['bytes_received'] += body_size
+
+            if etag is None and last_modified is None:
+                self._entries.pop(key, None)
+                return
+
+            self._entries[key] = (etag, last_modified, response, body_size)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
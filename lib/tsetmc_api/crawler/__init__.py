@@ -0,0 +1,3 @@
+from .crawler import Crawler, CrawlSection, CrawlResult
+from .checkpoint import CrawlCheckpoint
+from .store import CrawlStore
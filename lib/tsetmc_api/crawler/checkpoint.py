@@ -0,0 +1,84 @@
+import json
+import os
+
+from jdatetime import date as jdate
+
+
+class CrawlCheckpoint:
+    """
+    append only json lines log of crawl progress, it records the trading days planned for each symbol (so
+    daily histories are not fetched again) and every (symbol, date, section) that is stored, an interrupted crawl
+    replays it and continues from where it stopped
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._planned = {}
+        self._done = set()
+        self._file = None
+
+        if os.path.exists(path):
+            self._load()
+
+    def get_planned_dates(self, symbol_id: str, end_date: jdate) -> list[jdate] | None:
+        """
+        returns planned trading days of a symbol, None if they were never planned or were planned before end_date
+        (so days traded since then are missing)
+        """
+
+        planned = self._planned.get(symbol_id)
+        if planned is None:
+            return None
+
+        dates, until = planned
+        if until is None or end_date >= until:
+            return None
+
+        return dates
+
+    def is_done(self, symbol_id: str, date: jdate, section: str) -> bool:
+        return (symbol_id, date, section) in self._done
+
+    def mark_planned(self, symbol_id: str, dates: list[jdate], until: jdate):
+        """
+        records trading days of a symbol known on until (the day they were planned)
+        """
+
+        self._planned[symbol_id] = (dates, until)
+        self._write({
+            'symbol_id': symbol_id,
+            'dates': [date.isoformat() for date in dates],
+            'until': until.isoformat(),
+        })
+
+    def mark_done(self, symbol_id: str, date: jdate, section: str):
+        self._done.add((symbol_id, date, section))
+        self._write({'symbol_id': symbol_id, 'date': date.isoformat(), 'section': section})
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _load(self):
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # last line of an interrupted crawl may be cut in half
+                    continue
+
+                if 'dates' in record:
+                    # plans written by older versions have no until and are planned again
+                    until = jdate.fromisoformat(record['until']) if 'until' in record else None
+                    self._planned[record['symbol_id']] = ([jdate.fromisoformat(date) for date in record['dates']], until)
+                else:
+                    self._done.add((record['symbol_id'], jdate.fromisoformat(record['date']), record['section']))
+
+    def _write(self, record: dict):
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+
+        self._file.write(json.dumps(record) + '\n')
+        self._file.flush()
@@ -0,0 +1,155 @@
+import asyncio
+from enum import Enum
+from typing import Iterable
+
+from jdatetime import date as jdate
+from pydantic import BaseModel
+
+from .checkpoint import CrawlCheckpoint
+from .store import CrawlStore
+from ..day_details import DayDetails
+from ..symbol import Symbol
+
+
+class CrawlSection(Enum):
+    PRICE_DATA = 'price_data'
+    ORDERBOOK_DATA = 'orderbook_data'
+    TRADES_DATA = 'trades_data'
+    TRADERS_TYPE_DATA = 'traders_type_data'
+    THRESHOLDS_DATA = 'thresholds_data'
+
+
+class CrawlResult(BaseModel):
+    planned: int = 0
+    skipped: int = 0
+    stored: int = 0
+    errors: dict[str, str] = {}
+
+
+class Crawler:
+    """
+    backfills day details of many symbols over a date range, only trading days of each symbol (taken from its daily
+    history) are requested, at most `concurrency` requests run at the same time and progress is recorded in a
+    checkpoint file so an interrupted crawl resumes without fetching stored data again
+    """
+
+    def __init__(
+            self,
+            symbol_ids: Iterable[str],
+            start_date: jdate,
+            end_date: jdate,
+            store_path: str,
+            checkpoint_path: str,
+            sections: Iterable[CrawlSection] = tuple(CrawlSection),
+            concurrency: int = 8,
+            retries: int = 3,
+            retry_delay: float = 5,
+    ):
+        if concurrency < 1:
+            raise ValueError('concurrency should be at least 1')
+
+        self.symbol_ids = list(symbol_ids)
+        self.start_date = start_date
+        self.end_date = end_date
+        self.sections = list(sections)
+        self.concurrency = concurrency
+        self.retries = retries
+        self.retry_delay = retry_delay
+
+        self.store = CrawlStore(root=store_path)
+        self.checkpoint_path = checkpoint_path
+
+    def crawl(self) -> CrawlResult:
+        """
+        runs the whole crawl and blocks until it is finished
+        """
+
+        return asyncio.run(self.aio_crawl())
+
+    async def aio_crawl(self) -> CrawlResult:
+        result = CrawlResult()
+        checkpoint = CrawlCheckpoint(path=self.checkpoint_path)
+
+        # a bounded queue keeps planning just ahead of the workers instead of holding millions of pending tasks
+        queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        workers = [
+            asyncio.create_task(self._aio_work(queue=queue, checkpoint=checkpoint, result=result))
+            for _ in range(self.concurrency)
+        ]
+
+        try:
+            for symbol_id in self.symbol_ids:
+                try:
+                    dates = await self._aio_get_trading_dates(symbol_id=symbol_id, checkpoint=checkpoint)
+                except Exception as ex:
+                    result.errors[symbol_id] = repr(ex)
+                    continue
+
+                for date in dates:
+                    for section in self.sections:
+                        result.planned += 1
+                        # the store is checked too, so data saved with another (or a lost) checkpoint is kept
+                        if (
+                                checkpoint.is_done(symbol_id=symbol_id, date=date, section=section.value) or
+                                self.store.exists(symbol_id=symbol_id, date=date, section=section.value)
+                        ):
+                            result.skipped += 1
+                            continue
+
+                        await queue.put((symbol_id, date, section))
+
+            await queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            checkpoint.close()
+
+        return result
+
+    async def _aio_get_trading_dates(self, symbol_id: str, checkpoint: CrawlCheckpoint) -> list[jdate]:
+        # days planned before end_date (e.g. when a resumed crawl extends it) are planned again
+        dates = checkpoint.get_planned_dates(symbol_id=symbol_id, end_date=self.end_date)
+        if dates is None:
+            today = jdate.today()
+            history = await self._aio_retry(Symbol(symbol_id=symbol_id).aio_get_daily_history)
+            dates = sorted({row.date for row in history})
+            checkpoint.mark_planned(symbol_id=symbol_id, dates=dates, until=today)
+
+        return [date for date in dates if self.start_date <= date <= self.end_date]
+
+    async def _aio_work(self, queue: asyncio.Queue, checkpoint: CrawlCheckpoint, result: CrawlResult):
+        while True:
+            symbol_id, date, section = await queue.get()
+            try:
+                data = await self._aio_retry(self._aio_fetch_section, symbol_id, date, section)
+                await asyncio.to_thread(self.store.save, symbol_id=symbol_id, date=date, section=section.value, data=data)
+                checkpoint.mark_done(symbol_id=symbol_id, date=date, section=section.value)
+                result.stored += 1
+            except Exception as ex:
+                result.errors[f'{symbol_id}/{date.isoformat()}/{section.value}'] = repr(ex)
+            finally:
+                queue.task_done()
+
+    async def _aio_retry(self, func, *args):
+        for attempt in range(self.retries + 1):
+            try:
+                return await func(*args)
+            except Exception:
+                if attempt == self.retries:
+                    raise
+                await asyncio.sleep(self.retry_delay * (attempt + 1))
+
+    @staticmethod
+    async def _aio_fetch_section(symbol_id: str, date: jdate, section: CrawlSection):
+        day_details = DayDetails(symbol_id=symbol_id, date=date)
+        if section == CrawlSection.PRICE_DATA:
+            return await day_details.aio_get_price_data()
+        elif section == CrawlSection.ORDERBOOK_DATA:
+            return await day_details.aio_get_orderbook_data()
+        elif section == CrawlSection.TRADES_DATA:
+            return await day_details.aio_get_trades_data()
+        elif section == CrawlSection.TRADERS_TYPE_DATA:
+            return await day_details.aio_get_traders_type_data()
+        else:
+            return await day_details.aio_get_thresholds_data()
@@ -0,0 +1,46 @@
+import json
+import os
+
+from jdatetime import date as jdate
+
+
+class CrawlStore:
+    """
+    stores crawled data as json files in root/<symbol_id>/<date>/<section>.json
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def get_path(self, symbol_id: str, date: jdate, section: str) -> str:
+        return os.path.join(self.root, symbol_id, date.isoformat(), f'{section}.json')
+
+    def exists(self, symbol_id: str, date: jdate, section: str) -> bool:
+        return os.path.exists(self.get_path(symbol_id=symbol_id, date=date, section=section))
+
+    def save(self, symbol_id: str, date: jdate, section: str, data):
+        """
+        saves data (pydantic models or lists of them), the file is replaced atomically so a crash never leaves a half
+        written file behind
+        """
+
+        path = self.get_path(symbol_id=symbol_id, date=date, section=section)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        if isinstance(data, list):
+            data = [row.dict() for row in data]
+        else:
+            data = data.dict()
+
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, default=str)
+        os.replace(tmp_path, path)
+
+    def load(self, symbol_id: str, date: jdate, section: str):
+        """
+        returns stored data as plain dicts (times are stored as "HH:MM:SS" strings)
+        """
+
+        with open(self.get_path(symbol_id=symbol_id, date=date, section=section), encoding='utf-8') as f:
+            return json.load(f)
@@ -1 +1,4 @@
 from .day_details import DayDetails
+from .event_stream import DayDetailsEventStream, DayDetailsEvent, DayDetailsEventType
+from .bundle import DayDetailsBundle
+from .loader import DayDetailsLoader
@@ -1,9 +1,9 @@
-from collections import defaultdict
-from copy import deepcopy
+from typing import Iterable, Iterator, AsyncIterator
 
-from jdatetime import date as jdate
+from jdatetime import date as jdate, time as jtime
 
-from ..utils import convert_deven_to_jdate, convert_heven_to_jtime, safe_request, aio_safe_request
+from ..utils import convert_heven_to_jtime, convert_hevens_to_jtimes, convert_devens_to_jdates, safe_request, \
+    aio_safe_request, stream_request, aio_stream_request, iter_json_array_items, aio_iter_json_array_items, aio_run_json_parser
 
 
 def get_day_details_price_overview(symbol_id: str, date: jdate, response: dict = None) -> dict:
@@ -48,19 +48,38 @@ def get_day_details_price_data(symbol_id: str, date: jdate, response: dict = Non
         )
         response = response.json()['closingPriceHistory']
 
-    price_data = [{
-        'time': convert_heven_to_jtime(heven=row['hEven']),
+    times = convert_hevens_to_jtimes(row['hEven'] for row in response)
+    price_data = [_convert_price_data_row(row=row, t=t) for t, row in zip(times, response)]
+
+    return price_data
+
+
+def _convert_price_data_row(row: dict, t: jtime) -> dict:
+    return {
+        'time': t,
         'close': int(row['pClosing']),
         'last': int(row['pDrCotVal']),
         'value': int(row['qTotCap']),
         'volume': int(row['qTotTran5J']),
         'count': int(row['zTotTran']),
-    } for row in response]
+    }
 
-    return price_data
 
+def apply_orderbook_levels(rows: list, levels: dict) -> list:
+    """
+    returns a copy of orderbook rows with changed levels (keyed by zero based index) applied
+    """
 
-def get_day_details_orderbook_data(symbol_id: str, date: jdate, response: dict = None) -> list[dict]:
+    rows = list(rows)
+    for index, row in levels.items():
+        while len(rows) < index + 1:
+            rows.append(None)
+        rows[index] = row
+
+    return rows
+
+
+def get_day_details_orderbook_deltas(symbol_id: str, date: jdate, response: dict = None) -> list[dict]:
     if response is None:
         t = date.togregorian().strftime('%Y%m%d')
         response = safe_request(
@@ -74,46 +93,61 @@ def get_day_details_orderbook_data(symbol_id: str, date: jdate, response: dict =
         )
         response = response.json()['bestLimitsHistory']
     response = sorted(response, key=lambda x: (x['hEven'], x['number']))
+    times = convert_hevens_to_jtimes(row['hEven'] for row in response)
 
-    prev_data = {'buy_rows': [], 'sell_rows': []}
-    heven_map = defaultdict(lambda: {'buy_rows': [], 'sell_rows': []})
-    for row in response:
-        heven = row['hEven']
-        t = convert_heven_to_jtime(heven=heven)
+    deltas = []
+    delta = None
+    for t, row in zip(times, response):
+        if delta is None or delta['heven'] != row['hEven']:
+            delta = _new_orderbook_delta(row=row, t=t)
+            deltas.append(delta)
+        _add_orderbook_delta_level(delta=delta, row=row)
+
+    return deltas
 
-        buy_row = {
-            'time': t,
-            'count': row['zOrdMeDem'],
-            'price': row['pMeDem'],
-            'volume': row['qTitMeDem'],
-        }
-        sell_row = {
-            'time': t,
-            'count': row['zOrdMeOf'],
-            'price': row['pMeOf'],
-            'volume': row['qTitMeOf'],
-        }
 
-        index = row['number'] - 1
+def _new_orderbook_delta(row: dict, t: jtime) -> dict:
+    return {
+        'heven': row['hEven'],
+        'time': t,
+        'buy_rows': {},
+        'sell_rows': {},
+    }
 
-        if heven not in heven_map:
-            heven_map[heven] = deepcopy(prev_data)
 
-        while len(heven_map[heven]['buy_rows']) < index + 1:
-            heven_map[heven]['buy_rows'].append(None)
+def _add_orderbook_delta_level(delta: dict, row: dict):
+    index = row['number'] - 1
+    delta['buy_rows'][index] = {
+        'time': delta['time'],
+        'count': row['zOrdMeDem'],
+        'price': row['pMeDem'],
+        'volume': row['qTitMeDem'],
+    }
+    delta['sell_rows'][index] = {
+        'time': delta['time'],
+        'count': row['zOrdMeOf'],
+        'price': row['pMeOf'],
+        'volume': row['qTitMeOf'],
+    }
 
-        while len(heven_map[heven]['sell_rows']) < index + 1:
-            heven_map[heven]['sell_rows'].append(None)
 
-        heven_map[heven]['buy_rows'][index] = buy_row
-        heven_map[heven]['sell_rows'][index] = sell_row
+def get_day_details_orderbook_data(symbol_id: str, date: jdate, response: dict = None) -> list[dict]:
+    deltas = get_day_details_orderbook_deltas(symbol_id=symbol_id, date=date, response=response)
 
-        prev_data = heven_map[heven]
+    # snapshots share unchanged row dicts with their predecessors instead of deep copying them
+    orderbook_data = []
+    buy_rows = []
+    sell_rows = []
+    for delta in deltas:
+        buy_rows = apply_orderbook_levels(rows=buy_rows, levels=delta['buy_rows'])
+        sell_rows = apply_orderbook_levels(rows=sell_rows, levels=delta['sell_rows'])
+        orderbook_data.append({
+            'time': delta['time'],
+            'buy_rows': buy_rows,
+            'sell_rows': sell_rows,
+        })
 
-    return [{
-        'time': convert_heven_to_jtime(heven=key),
-        **value,
-    } for key, value in heven_map.items()]
+    return orderbook_data
 
 
 def get_day_details_trade_data(symbol_id: str, date: jdate, summarize: bool, response: dict = None) -> list[dict]:
@@ -131,11 +165,16 @@ def get_day_details_trade_data(symbol_id: str, date: jdate, summarize: bool, res
         )
         response = response.json()['tradeHistory']
 
-    return [{
-        'time': convert_heven_to_jtime(heven=row['hEven']),
+    times = convert_hevens_to_jtimes(row['hEven'] for row in response)
+    return [_convert_trade_data_row(row=row, t=t) for t, row in zip(times, response)]
+
+
+def _convert_trade_data_row(row: dict, t: jtime) -> dict:
+    return {
+        'time': t,
         'price': row['pTran'],
         'volume': row['qTitTran'],
-    } for row in response]
+    }
 
 
 def get_day_details_traders_type_data(symbol_id: str, date: jdate, response: dict = None) -> dict:
@@ -246,11 +285,12 @@ def get_shareholder_chart_data(symbol_id: str, shareholder_id: str, days: int, r
         )
         response = response.json()['shareHolder']
 
+    dates = convert_devens_to_jdates(row['dEven'] for row in response)
     return [{
-        'date': convert_deven_to_jdate(deven=row['dEven']),
+        'date': d,
         'shares_count': row['numberOfShares'],
         'shares_percentage': row['perOfShares'],
-    } for row in response]
+    } for d, row in zip(dates, response)]
 
 
 def get_shareholder_portfolio(shareholder_id: str, response: dict = None) -> list[dict]:
@@ -275,6 +315,125 @@ def get_shareholder_portfolio(shareholder_id: str, response: dict = None) -> lis
     } for row in response]
 
 
+def _get_row_time(row: dict, times: dict) -> jtime:
+    t = times.get(row['hEven'])
+    if t is None:
+        t = times[row['hEven']] = convert_heven_to_jtime(heven=row['hEven'])
+    return t
+
+
+class _OrderbookDeltaCollector:
+    """
+    groups streamed orderbook rows into deltas ordered by (hEven, number), a group is yielded as soon as the next
+    hEven shows up when the server sends the rows in ascending order, otherwise all rows are kept until the end
+    """
+
+    def __init__(self):
+        self._times = {}
+        self._group = []
+        self._ascending = None
+        self._rows = []
+
+    def add(self, row: dict) -> list[dict]:
+        heven = row['hEven']
+        if self._group and heven != self._group[0]['hEven']:
+            if self._ascending is None:
+                self._ascending = heven > self._group[0]['hEven']
+
+            if not self._ascending:
+                self._rows.extend(self._group)
+                self._group = [row]
+                return []
+
+            if heven < self._group[0]['hEven']:
+                raise ValueError('orderbook rows are not sent in heven order, use get_day_details_orderbook_deltas')
+
+            deltas = self._build_deltas(rows=self._group)
+            self._group = [row]
+            return deltas
+
+        self._group.append(row)
+        return []
+
+    def finish(self) -> list[dict]:
+        rows = self._rows + self._group
+        self._rows = []
+        self._group = []
+        return self._build_deltas(rows=rows)
+
+    def _build_deltas(self, rows: list[dict]) -> list[dict]:
+        deltas = []
+        delta = None
+        for row in sorted(rows, key=lambda x: (x['hEven'], x['number'])):
+            if delta is None or delta['heven'] != row['hEven']:
+                delta = _new_orderbook_delta(row=row, t=_get_row_time(row=row, times=self._times))
+                deltas.append(delta)
+            _add_orderbook_delta_level(delta=delta, row=row)
+
+        return deltas
+
+
+def iter_day_details_price_data(symbol_id: str, date: jdate, chunks: Iterable[bytes] = None) -> Iterator[dict]:
+    if chunks is None:
+        t = date.togregorian().strftime('%Y%m%d')
+        chunks = stream_request(
+            method='GET',
+            url=f'http://cdn.tsetmc.com/api/ClosingPrice/GetClosingPriceHistory/{symbol_id}/{t}',
+            params={},
+            headers={
+                'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/113.0.0.0 Safari/537.36',
+            },
+            verify=False
+        )
+
+    times = {}
+    for row in iter_json_array_items(chunks=chunks, key='closingPriceHistory'):
+        yield _convert_price_data_row(row=row, t=_get_row_time(row=row, times=times))
+
+
+def iter_day_details_orderbook_deltas(symbol_id: str, date: jdate, chunks: Iterable[bytes] = None) -> Iterator[dict]:
+    """
+    yields orderbook deltas sorted like get_day_details_orderbook_deltas (by heven, then by row number)
+    """
+
+    if chunks is None:
+        t = date.togregorian().strftime('%Y%m%d')
+        chunks = stream_request(
+            method='GET',
+            url=f'http://cdn.tsetmc.com/api/BestLimits/{symbol_id}/{t}',
+            params={},
+            headers={
+                'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/113.0.0.0 Safari/537.36',
+            },
+            verify=False
+        )
+
+    collector = _OrderbookDeltaCollector()
+    for row in iter_json_array_items(chunks=chunks, key='bestLimitsHistory'):
+        yield from collector.add(row=row)
+
+    yield from collector.finish()
+
+
+def iter_day_details_trade_data(symbol_id: str, date: jdate, summarize: bool, chunks: Iterable[bytes] = None) -> Iterator[dict]:
+    if chunks is None:
+        t = date.togregorian().strftime('%Y%m%d')
+        summarize_url_ph = 'true' if summarize else 'false'
+        chunks = stream_request(
+            method='GET',
+            url=f'http://cdn.tsetmc.com/api/Trade/GetTradeHistory/{symbol_id}/{t}/{summarize_url_ph}',
+            params={},
+            headers={
+                'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/113.0.0.0 Safari/537.36',
+            },
+            verify=False
+        )
+
+    times = {}
+    for row in iter_json_array_items(chunks=chunks, key='tradeHistory'):
+        yield _convert_trade_data_row(row=row, t=_get_row_time(row=row, times=times))
+
+
 async def aio_get_day_details_price_overview(symbol_id: str, date: jdate) -> dict:
     t = date.togregorian().strftime('%Y%m%d')
     response = await aio_safe_request(
@@ -286,10 +445,7 @@ async def aio_get_day_details_price_overview(symbol_id: str, date: jdate) -> dic
         },
         verify=False
     )
-    js = (await response.json())
-    print(js)
-    response = js['closingPriceDaily']
-    return get_day_details_price_overview(symbol_id=symbol_id, date=date, response=response)
+    return await aio_run_json_parser(get_day_details_price_overview, response.text, 'closingPriceDaily', symbol_id=symbol_id, date=date)
 
 
 async def aio_get_day_details_price_data(symbol_id: str, date: jdate) -> list[dict]:
@@ -303,8 +459,7 @@ async def aio_get_day_details_price_data(symbol_id: str, date: jdate) -> list[di
         },
         verify=False
     )
-    response = (await response.json())['closingPriceHistory']
-    return get_day_details_price_data(symbol_id=symbol_id, date=date, response=response)
+    return await aio_run_json_parser(get_day_details_price_data, response.text, 'closingPriceHistory', symbol_id=symbol_id, date=date)
 
 
 async def aio_get_day_details_orderbook_data(symbol_id: str, date: jdate) -> list[dict]:
@@ -318,8 +473,21 @@ async def aio_get_day_details_orderbook_data(symbol_id: str, date: jdate) -> lis
         },
         verify=False
     )
-    response = (await response.json())['bestLimitsHistory']
-    return get_day_details_orderbook_data(symbol_id=symbol_id, date=date, response=response)
+    return await aio_run_json_parser(get_day_details_orderbook_data, response.text, 'bestLimitsHistory', symbol_id=symbol_id, date=date)
+
+
+async def aio_get_day_details_orderbook_deltas(symbol_id: str, date: jdate) -> list[dict]:
+    t = date.togregorian().strftime('%Y%m%d')
+    response = await aio_safe_request(
+        method='GET',
+        url=f'http://cdn.tsetmc.com/api/BestLimits/{symbol_id}/{t}',
+        params={},
+        headers={
+            'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/113.0.0.0 Safari/537.36',
+        },
+        verify=False
+    )
+    return await aio_run_json_parser(get_day_details_orderbook_deltas, response.text, 'bestLimitsHistory', symbol_id=symbol_id, date=date)
 
 
 async def aio_get_day_details_trade_data(symbol_id: str, date: jdate, summarize: bool) -> list[dict]:
@@ -334,8 +502,7 @@ async def aio_get_day_details_trade_data(symbol_id: str, date: jdate, summarize:
         },
         verify=False
     )
-    response = (await response.json())['tradeHistory']
-    return get_day_details_trade_data(symbol_id=symbol_id, date=date, summarize=summarize, response=response)
+    return await aio_run_json_parser(get_day_details_trade_data, response.text, 'tradeHistory', symbol_id=symbol_id, date=date, summarize=summarize)
 
 
 async def aio_get_day_details_traders_type_data(symbol_id: str, date: jdate) -> dict:
@@ -349,8 +516,7 @@ async def aio_get_day_details_traders_type_data(symbol_id: str, date: jdate) ->
         },
         verify=False
     )
-    response = (await response.json())['clientType']
-    return get_day_details_traders_type_data(symbol_id=symbol_id, date=date, response=response)
+    return await aio_run_json_parser(get_day_details_traders_type_data, response.text, 'clientType', symbol_id=symbol_id, date=date)
 
 
 async def aio_get_day_details_thresholds_data(symbol_id: str, date: jdate) -> dict:
@@ -364,8 +530,7 @@ async def aio_get_day_details_thresholds_data(symbol_id: str, date: jdate) -> di
         },
         verify=False
     )
-    response = (await response.json())['staticThreshold']
-    return get_day_details_thresholds_data(symbol_id=symbol_id, date=date, response=response)
+    return await aio_run_json_parser(get_day_details_thresholds_data, response.text, 'staticThreshold', symbol_id=symbol_id, date=date)
 
 
 async def aio_get_day_details_shareholders_data(symbol_id: str, date: jdate) -> tuple[list[dict], list[dict]]:
@@ -379,8 +544,7 @@ async def aio_get_day_details_shareholders_data(symbol_id: str, date: jdate) ->
         },
         verify=False
     )
-    response = (await response.json())['shareShareholder']
-    return get_day_details_shareholders_data(symbol_id=symbol_id, date=date, response=response)
+    return await aio_run_json_parser(get_day_details_shareholders_data, response.text, 'shareShareholder', symbol_id=symbol_id, date=date)
 
 
 async def aio_get_shareholder_chart_data(symbol_id: str, shareholder_id: str, days: int) -> list[dict]:
@@ -393,8 +557,7 @@ async def aio_get_shareholder_chart_data(symbol_id: str, shareholder_id: str, da
         },
         verify=False
     )
-    response = (await response.json())['shareHolder']
-    return get_shareholder_chart_data(symbol_id=symbol_id, shareholder_id=shareholder_id, days=days, response=response)
+    return await aio_run_json_parser(get_shareholder_chart_data, response.text, 'shareHolder', symbol_id=symbol_id, shareholder_id=shareholder_id, days=days)
 
 
 async def aio_get_shareholder_portfolio(shareholder_id: str) -> list[dict]:
@@ -407,5 +570,60 @@ async def aio_get_shareholder_portfolio(shareholder_id: str) -> list[dict]:
         },
         verify=False
     )
-    response = (await response.json())['shareHolderShare']
-    return get_shareholder_portfolio(shareholder_id=shareholder_id, response=response)
+    return await aio_run_json_parser(get_shareholder_portfolio, response.text, 'shareHolderShare', shareholder_id=shareholder_id)
+
+
+async def aio_iter_day_details_price_data(symbol_id: str, date: jdate) -> AsyncIterator[dict]:
+    t = date.togregorian().strftime('%Y%m%d')
+    chunks = aio_stream_request(
+        method='GET',
+        url=f'http://cdn.tsetmc.com/api/ClosingPrice/GetClosingPriceHistory/{symbol_id}/{t}',
+        params={},
+        headers={
+            'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/113.0.0.0 Safari/537.36',
+        },
+        verify=False
+    )
+
+    times = {}
+    async for row in aio_iter_json_array_items(chunks=chunks, key='closingPriceHistory'):
+        yield _convert_price_data_row(row=row, t=_get_row_time(row=row, times=times))
+
+
+async def aio_iter_day_details_orderbook_deltas(symbol_id: str, date: jdate) -> AsyncIterator[dict]:
+    t = date.togregorian().strftime('%Y%m%d')
+    chunks = aio_stream_request(
+        method='GET',
+        url=f'http://cdn.tsetmc.com/api/BestLimits/{symbol_id}/{t}',
+        params={},
+        headers={
+            'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/113.0.0.0 Safari/537.36',
+        },
+        verify=False
+    )
+
+    collector = _OrderbookDeltaCollector()
+    async for row in aio_iter_json_array_items(chunks=chunks, key='bestLimitsHistory'):
+        for delta in collector.add(row=row):
+            yield delta
+
+    for delta in collector.finish():
+        yield delta
+
+
+async def aio_iter_day_details_trade_data(symbol_id: str, date: jdate, summarize: bool) -> AsyncIterator[dict]:
+    t = date.togregorian().strftime('%Y%m%d')
+    summarize_url_ph = 'true' if summarize else 'false'
+    chunks = aio_stream_request(
+        method='GET',
+        url=f'http://cdn.tsetmc.com/api/Trade/GetTradeHistory/{symbol_id}/{t}/{summarize_url_ph}',
+        params={},
+        headers={
+            'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/113.0.0.0 Safari/537.36',
+        },
+        verify=False
+    )
+
+    times = {}
+    async for row in aio_iter_json_array_items(chunks=chunks, key='tradeHistory'):
+        yield _convert_trade_data_row(row=row, t=_get_row_time(row=row, times=times))
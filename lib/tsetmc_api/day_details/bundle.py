@@ -0,0 +1,38 @@
+from jdatetime import date as jdate
+from pydantic import BaseModel
+
+from .orderbook import DayDetailsOrderBookDataRow
+from .price import DayDetailsPriceOverview, DayDetailsPriceDataRow
+from .shareholder import DayDetailsShareHolderDataRow
+from .threshold import DayDetailsThresholdsData
+from .trade import DayDetailsTradeDataRow
+from .traders_type import DayDetailsTradersTypeData
+
+BUNDLE_SECTIONS = (
+    'price_overview',
+    'price_data',
+    'orderbook_data',
+    'trades_data',
+    'traders_type_data',
+    'thresholds_data',
+    'shareholders_data',
+)
+
+
+class DayDetailsBundle(BaseModel):
+    symbol_id: str
+    date: jdate
+    # sections that were not requested or failed are None, errors holds the exception of each failed section
+    price_overview: DayDetailsPriceOverview | None = None
+    price_data: list[DayDetailsPriceDataRow] | None = None
+    orderbook_data: list[DayDetailsOrderBookDataRow] | None = None
+    trades_data: list[DayDetailsTradeDataRow] | None = None
+    traders_type_data: DayDetailsTradersTypeData | None = None
+    thresholds_data: DayDetailsThresholdsData | None = None
+    shareholders_data: tuple[list[DayDetailsShareHolderDataRow], list[DayDetailsShareHolderDataRow]] | None = None
+    errors: dict[str, Exception] = {}
+
+    class Config:
+        arbitrary_types_allowed = True
+        # rows are already validated models, copying thousands of them again is wasted work
+        copy_on_model_validation = 'none'
@@ -1,12 +1,21 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from typing import Iterable, Iterator, AsyncIterator
+
 from jdatetime import date as jdate
 
 from . import _core
-from .orderbook import DayDetailsOrderBookDataRow, DayDetailsOrderBookRow
+from .bundle import DayDetailsBundle, BUNDLE_SECTIONS
+from .orderbook import DayDetailsOrderBookDataRow, DayDetailsOrderBookRow, DayDetailsOrderBookDelta, \
+    DayDetailsOrderBookHistory
 from .price import DayDetailsPriceDataRow, DayDetailsPriceOverview
 from .shareholder import DayDetailsShareHolderDataRow, DayDetailsShareHolder
 from .threshold import DayDetailsThresholdsData
+from .time_index import DayDetailsTimeIndex
 from .trade import DayDetailsTradeDataRow
 from .traders_type import DayDetailsTradersTypeData, DayDetailsTradersTypeInfo, DayDetailsTradersTypeSubInfo
+from ..utils import aio_build_models, shared_session, aio_shared_session
 
 
 class DayDetails:
@@ -76,6 +85,51 @@ class DayDetails:
             ) for row in data['sell_rows']],
         ) for data in raw_data]
     
+    def get_orderbook_history(self, raw_data: list[dict] = None) -> DayDetailsOrderBookHistory:
+        """
+        returns orderbook changes of that date as deltas, full orderbooks are built lazily
+        """
+        
+        if raw_data is None:
+            raw_data = _core.get_day_details_orderbook_deltas(symbol_id=self.symbol_id, date=self.date)
+        
+        return DayDetailsOrderBookHistory(deltas=[self._build_orderbook_delta(delta=delta) for delta in raw_data])
+    
+    @staticmethod
+    def _build_orderbook_delta(delta: dict) -> DayDetailsOrderBookDelta:
+        return DayDetailsOrderBookDelta(
+            time=delta['time'],
+            buy_rows={index: DayDetailsOrderBookRow(
+                time=row['time'],
+                count=row['count'],
+                price=row['price'],
+                volume=row['volume'],
+            ) for index, row in delta['buy_rows'].items()},
+            sell_rows={index: DayDetailsOrderBookRow(
+                time=row['time'],
+                count=row['count'],
+                price=row['price'],
+                volume=row['volume'],
+            ) for index, row in delta['sell_rows'].items()},
+        )
+    
+    def get_time_index(
+            self,
+            price_data: list[DayDetailsPriceDataRow] = None,
+            orderbook_data: list[DayDetailsOrderBookDataRow] = None,
+    ) -> DayDetailsTimeIndex:
+        """
+        returns a time index for as-of lookups over prices and orderbooks of that date
+        (pass already fetched data to avoid fetching it again)
+        """
+        
+        if price_data is None:
+            price_data = self.get_price_data()
+        if orderbook_data is None:
+            orderbook_data = self.get_orderbook_data()
+        
+        return DayDetailsTimeIndex(price_data=price_data, orderbook_data=orderbook_data)
+    
     def get_traders_type_data(self, raw_data: dict = None) -> DayDetailsTradersTypeData:
         """
         returns traders type information for that day
@@ -125,6 +179,41 @@ class DayDetails:
             volume=row['volume'],
         ) for row in raw_data]
     
+    def iter_price_data(self) -> Iterator[DayDetailsPriceDataRow]:
+        """
+        streams instant prices while the response is being downloaded
+        """
+        
+        for row in _core.iter_day_details_price_data(symbol_id=self.symbol_id, date=self.date):
+            yield DayDetailsPriceDataRow(
+                time=row['time'],
+                close=row['close'],
+                last=row['last'],
+                value=row['value'],
+                volume=row['volume'],
+                count=row['count'],
+            )
+    
+    def iter_orderbook_deltas(self) -> Iterator[DayDetailsOrderBookDelta]:
+        """
+        streams orderbook deltas while the response is being downloaded (ordered like get_orderbook_deltas)
+        """
+        
+        for delta in _core.iter_day_details_orderbook_deltas(symbol_id=self.symbol_id, date=self.date):
+            yield self._build_orderbook_delta(delta=delta)
+    
+    def iter_trades_data(self, summarize: bool = False) -> Iterator[DayDetailsTradeDataRow]:
+        """
+        streams trade data while the response is being downloaded
+        """
+        
+        for row in _core.iter_day_details_trade_data(symbol_id=self.symbol_id, date=self.date, summarize=summarize):
+            yield DayDetailsTradeDataRow(
+                time=row['time'],
+                price=row['price'],
+                volume=row['volume'],
+            )
+    
     def get_thresholds_data(self, raw_data: dict = None) -> DayDetailsThresholdsData:
         if raw_data is None:
             raw_data = _core.get_day_details_thresholds_data(symbol_id=self.symbol_id, date=self.date)
@@ -164,20 +253,71 @@ class DayDetails:
         
         return old_shareholders, new_shareholders
     
+    def get_bundle(self, sections: Iterable[str] = None) -> DayDetailsBundle:
+        """
+        fetches all (or some of BUNDLE_SECTIONS) sections of that date concurrently over shared connections,
+        a failing section is left as None and its exception is put in errors
+        """
+        
+        sections = self._get_bundle_sections(sections=sections)
+        with shared_session(), ThreadPoolExecutor(max_workers=len(sections)) as executor:
+            futures = {
+                section: executor.submit(copy_context().run, getattr(self, f'get_{section}'))
+                for section in sections
+            }
+        
+        data = {}
+        errors = {}
+        for section, future in futures.items():
+            try:
+                data[section] = future.result()
+            except Exception as ex:
+                errors[section] = ex
+        
+        return DayDetailsBundle(symbol_id=self.symbol_id, date=self.date, errors=errors, **data)
+    
+    @staticmethod
+    def _get_bundle_sections(sections: Iterable[str] | None) -> list[str]:
+        if sections is None:
+            return list(BUNDLE_SECTIONS)
+        
+        sections = list(dict.fromkeys(sections))
+        unknown = set(sections) - set(BUNDLE_SECTIONS)
+        if unknown:
+            raise ValueError(f'unknown bundle sections: {", ".join(sorted(unknown))}')
+        if not sections:
+            raise ValueError('at least one bundle section should be requested')
+        
+        return sections
+    
     async def aio_get_price_overview(self) -> DayDetailsPriceOverview:
         return self.get_price_overview(
             raw_data=await _core.aio_get_day_details_price_overview(symbol_id=self.symbol_id, date=self.date)
         )
     
     async def aio_get_price_data(self) -> list[DayDetailsPriceDataRow]:
-        return self.get_price_data(
-            raw_data=await _core.aio_get_day_details_price_data(symbol_id=self.symbol_id, date=self.date)
-        )
+        raw_data = await _core.aio_get_day_details_price_data(symbol_id=self.symbol_id, date=self.date)
+        return await aio_build_models(self.get_price_data, len(raw_data), raw_data=raw_data)
     
     async def aio_get_orderbook_data(self) -> list[DayDetailsOrderBookDataRow]:
-        return self.get_orderbook_data(
-            raw_data=await _core.aio_get_day_details_orderbook_data(symbol_id=self.symbol_id, date=self.date)
-        )
+        raw_data = await _core.aio_get_day_details_orderbook_data(symbol_id=self.symbol_id, date=self.date)
+        return await aio_build_models(self.get_orderbook_data, len(raw_data), raw_data=raw_data)
+    
+    async def aio_get_orderbook_history(self) -> DayDetailsOrderBookHistory:
+        raw_data = await _core.aio_get_day_details_orderbook_deltas(symbol_id=self.symbol_id, date=self.date)
+        return await aio_build_models(self.get_orderbook_history, len(raw_data), raw_data=raw_data)
+    
+    async def aio_get_time_index(
+            self,
+            price_data: list[DayDetailsPriceDataRow] = None,
+            orderbook_data: list[DayDetailsOrderBookDataRow] = None,
+    ) -> DayDetailsTimeIndex:
+        if price_data is None:
+            price_data = await self.aio_get_price_data()
+        if orderbook_data is None:
+            orderbook_data = await self.aio_get_orderbook_data()
+        
+        return self.get_time_index(price_data=price_data, orderbook_data=orderbook_data)
     
     async def aio_get_traders_type_data(self) -> DayDetailsTradersTypeData:
         return self.get_traders_type_data(
@@ -185,10 +325,8 @@ class DayDetails:
         )
     
     async def aio_get_trades_data(self, summarize: bool = False) -> list[DayDetailsTradeDataRow]:
-        return self.get_trades_data(
-            summarize=summarize,
-            raw_data=await _core.aio_get_day_details_trade_data(symbol_id=self.symbol_id, date=self.date, summarize=summarize)
-        )
+        raw_data = await _core.aio_get_day_details_trade_data(symbol_id=self.symbol_id, date=self.date, summarize=summarize)
+        return await aio_build_models(self.get_trades_data, len(raw_data), summarize=summarize, raw_data=raw_data)
     
     async def aio_get_thresholds_data(self) -> DayDetailsThresholdsData:
         return self.get_thresholds_data(
@@ -199,3 +337,46 @@ class DayDetails:
         return self.get_shareholders_data(
             raw_data=await _core.aio_get_day_details_shareholders_data(symbol_id=self.symbol_id, date=self.date)
         )
+    
+    async def aio_get_bundle(self, sections: Iterable[str] = None) -> DayDetailsBundle:
+        sections = self._get_bundle_sections(sections=sections)
+        async with aio_shared_session():
+            results = await asyncio.gather(
+                *(getattr(self, f'aio_get_{section}')() for section in sections),
+                return_exceptions=True,
+            )
+        
+        data = {}
+        errors = {}
+        for section, result in zip(sections, results):
+            if isinstance(result, Exception):
+                errors[section] = result
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                data[section] = result
+        
+        return DayDetailsBundle(symbol_id=self.symbol_id, date=self.date, errors=errors, **data)
+    
+    async def aio_iter_price_data(self) -> AsyncIterator[DayDetailsPriceDataRow]:
+        async for row in _core.aio_iter_day_details_price_data(symbol_id=self.symbol_id, date=self.date):
+            yield DayDetailsPriceDataRow(
+                time=row['time'],
+                close=row['close'],
+                last=row['last'],
+                value=row['value'],
+                volume=row['volume'],
+                count=row['count'],
+            )
+    
+    async def aio_iter_orderbook_deltas(self) -> AsyncIterator[DayDetailsOrderBookDelta]:
+        async for delta in _core.aio_iter_day_details_orderbook_deltas(symbol_id=self.symbol_id, date=self.date):
+            yield self._build_orderbook_delta(delta=delta)
+    
+    async def aio_iter_trades_data(self, summarize: bool = False) -> AsyncIterator[DayDetailsTradeDataRow]:
+        async for row in _core.aio_iter_day_details_trade_data(symbol_id=self.symbol_id, date=self.date, summarize=summarize):
+            yield DayDetailsTradeDataRow(
+                time=row['time'],
+                price=row['price'],
+                volume=row['volume'],
+            )
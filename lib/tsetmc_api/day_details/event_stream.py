@@ -0,0 +1,137 @@
+import heapq
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future
+from enum import Enum
+from operator import itemgetter
+from typing import Any, Iterable, Iterator
+
+from jdatetime import date as jdate
+from jdatetime import time as jtime
+from pydantic import BaseModel
+
+from .day_details import DayDetails
+from ..utils import convert_jtime_to_heven
+
+
+class DayDetailsEventType(Enum):
+    # values also break ties between events of the same time (a trade comes before the price and orderbook it moved)
+    TRADE = 1
+    PRICE = 2
+    ORDERBOOK = 3
+
+
+class DayDetailsEvent(BaseModel):
+    symbol_id: str
+    date: jdate
+    time: jtime
+    type: DayDetailsEventType
+    # DayDetailsTradeDataRow, DayDetailsPriceDataRow or DayDetailsOrderBookDataRow depending on type
+    data: Any
+
+    class Config:
+        arbitrary_types_allowed = True
+
+
+class DayDetailsEventStream:
+    """
+    lazily merges trades, prices and orderbooks of many (symbol_id, date) sources into one stream ordered by date and
+    time, sources of a date are k-way merged with a heap and the next `prefetch` dates are fetched in the background,
+    so memory is bounded by the sources of a few dates and not by the whole range, a source that fails to load is
+    left out of the stream and its exception is put in errors (keyed by (symbol_id, date))
+    """
+
+    def __init__(
+            self,
+            sources: Iterable[tuple[str, jdate]],
+            types: Iterable[DayDetailsEventType] = tuple(DayDetailsEventType),
+            prefetch: int = 1,
+            max_workers: int = 8,
+    ):
+        if prefetch < 0:
+            raise ValueError('prefetch should not be negative')
+        if max_workers < 1:
+            raise ValueError('max_workers should be at least 1')
+
+        self.types = set(types)
+        self.prefetch = prefetch
+        self.max_workers = max_workers
+        self.errors: dict[tuple[str, jdate], Exception] = {}
+
+        self._sources_by_date = {}
+        for symbol_id, date in sources:
+            self._sources_by_date.setdefault(date, []).append(symbol_id)
+
+    def __iter__(self) -> Iterator[DayDetailsEvent]:
+        self.errors = {}
+        dates = iter(sorted(self._sources_by_date))
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        pending: deque[tuple[jdate, list[tuple[str, Future]]]] = deque()
+
+        def submit_next_date():
+            date = next(dates, None)
+            if date is not None:
+                pending.append((date, [
+                    (symbol_id, executor.submit(self._load_source, symbol_id, date, index))
+                    for index, symbol_id in enumerate(self._sources_by_date[date])
+                ]))
+
+        try:
+            for _ in range(self.prefetch + 1):
+                submit_next_date()
+
+            while pending:
+                date, futures = pending.popleft()
+                submit_next_date()
+
+                streams = []
+                for symbol_id, future in futures:
+                    try:
+                        streams.extend(future.result())
+                    except Exception as ex:
+                        self.errors[(symbol_id, date)] = ex
+                for _, event in heapq.merge(*streams, key=itemgetter(0)):
+                    yield event
+        finally:
+            # a consumer that stops early should not wait for prefetched dates that were not started yet
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _load_source(self, symbol_id: str, date: jdate, index: int) -> list[Iterator[tuple[tuple, DayDetailsEvent]]]:
+        day_details = DayDetails(symbol_id=symbol_id, date=date)
+
+        streams = []
+        if DayDetailsEventType.TRADE in self.types:
+            streams.append(self._iter_events(
+                symbol_id=symbol_id, date=date, index=index,
+                event_type=DayDetailsEventType.TRADE, rows=day_details.get_trades_data(),
+            ))
+        if DayDetailsEventType.PRICE in self.types:
+            streams.append(self._iter_events(
+                symbol_id=symbol_id, date=date, index=index,
+                event_type=DayDetailsEventType.PRICE, rows=day_details.get_price_data(),
+            ))
+        if DayDetailsEventType.ORDERBOOK in self.types:
+            # full orderbooks are built from deltas one by one while the stream is consumed
+            streams.append(self._iter_events(
+                symbol_id=symbol_id, date=date, index=index,
+                event_type=DayDetailsEventType.ORDERBOOK, rows=day_details.get_orderbook_history().iter_orderbook_data(),
+                is_sorted=True,
+            ))
+
+        return streams
+
+    @staticmethod
+    def _iter_events(
+            symbol_id: str,
+            date: jdate,
+            index: int,
+            event_type: DayDetailsEventType,
+            rows: Iterable,
+            is_sorted: bool = False,
+    ) -> Iterator[tuple[tuple, DayDetailsEvent]]:
+        if not is_sorted:
+            rows = sorted(rows, key=lambda row: convert_jtime_to_heven(t=row.time))
+
+        for row in rows:
+            key = (convert_jtime_to_heven(t=row.time), event_type.value, index)
+            yield key, DayDetailsEvent(symbol_id=symbol_id, date=date, time=row.time, type=event_type, data=row)
@@ -0,0 +1,93 @@
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, AsyncIterator
+
+from jdatetime import date as jdate
+
+from .bundle import DayDetailsBundle
+from .day_details import DayDetails
+
+LOADER_SECTIONS = ('price_overview', 'trades_data', 'orderbook_data', 'traders_type_data', 'thresholds_data')
+
+
+def _count_rows(bundle: DayDetailsBundle) -> int:
+    return len(bundle.trades_data or ()) + len(bundle.orderbook_data or ())
+
+
+class DayDetailsLoader:
+    """
+    yields a bundle of LOADER_SECTIONS for each date of a symbol while the next `prefetch` dates are fetched in the
+    background, prefetching also pauses while fetched but not yet consumed bundles hold more than `max_buffered_rows`
+    trades and orderbooks (None means no limit)
+    """
+
+    def __init__(self, symbol_id: str, dates: Iterable[jdate], prefetch: int = 2, max_buffered_rows: int | None = None):
+        if prefetch < 1:
+            raise ValueError('prefetch should be at least 1')
+        if max_buffered_rows is not None and max_buffered_rows < 1:
+            # a full buffer pauses prefetching, with no room at all nothing would ever be fetched
+            raise ValueError('max_buffered_rows should be at least 1')
+
+        self.symbol_id = symbol_id
+        self.dates = list(dates)
+        self.prefetch = prefetch
+        self.max_buffered_rows = max_buffered_rows
+
+    def __iter__(self) -> Iterator[DayDetailsBundle]:
+        dates = iter(self.dates)
+        pending = deque()
+        executor = ThreadPoolExecutor(max_workers=self.prefetch)
+
+        def top_up():
+            while len(pending) < self.prefetch and not self._is_buffer_full(bundles=(
+                    future.result() for future in pending if future.done() and future.exception() is None
+            )):
+                date = next(dates, None)
+                if date is None:
+                    return
+                pending.append(executor.submit(self._load_bundle, date))
+
+        try:
+            top_up()
+            while pending:
+                bundle = pending.popleft().result()
+                top_up()
+                yield bundle
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def __aiter__(self) -> AsyncIterator[DayDetailsBundle]:
+        dates = iter(self.dates)
+        pending = deque()
+
+        def top_up():
+            while len(pending) < self.prefetch and not self._is_buffer_full(bundles=(
+                    task.result() for task in pending if task.done() and task.exception() is None
+            )):
+                date = next(dates, None)
+                if date is None:
+                    return
+                pending.append(asyncio.create_task(self._aio_load_bundle(date)))
+
+        try:
+            top_up()
+            while pending:
+                bundle = await pending.popleft()
+                top_up()
+                yield bundle
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _is_buffer_full(self, bundles: Iterable[DayDetailsBundle]) -> bool:
+        if self.max_buffered_rows is None:
+            return False
+
+        return sum(_count_rows(bundle=bundle) for bundle in bundles) >= self.max_buffered_rows
+
+    def _load_bundle(self, date: jdate) -> DayDetailsBundle:
+        return DayDetails(symbol_id=self.symbol_id, date=date).get_bundle(sections=LOADER_SECTIONS)
+
+    async def _aio_load_bundle(self, date: jdate) -> DayDetailsBundle:
+        return await DayDetails(symbol_id=self.symbol_id, date=date).aio_get_bundle(sections=LOADER_SECTIONS)
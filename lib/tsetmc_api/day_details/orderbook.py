@@ -1,6 +1,12 @@
+from bisect import bisect_right
+from typing import Iterator
+
 from jdatetime import time as jtime
 from pydantic import BaseModel
 
+from . import _core
+from ..utils import convert_jtime_to_heven
+
 
 class DayDetailsOrderBookRow(BaseModel):
     time: jtime
@@ -19,3 +25,81 @@ class DayDetailsOrderBookDataRow(BaseModel):
 
     class Config:
         arbitrary_types_allowed = True
+
+
+class DayDetailsOrderBookDelta(BaseModel):
+    time: jtime
+    buy_rows: dict[int, DayDetailsOrderBookRow]
+    sell_rows: dict[int, DayDetailsOrderBookRow]
+
+    class Config:
+        arbitrary_types_allowed = True
+
+
+class DayDetailsOrderBookHistory:
+    """
+    orderbook changes of a day stored as deltas (only the changed levels for each time),
+    full orderbooks are built on demand
+    """
+
+    def __init__(self, deltas: list[DayDetailsOrderBookDelta], keyframe_interval: int = 64):
+        self.deltas = deltas
+        self._hevens = [convert_jtime_to_heven(t=delta.time) for delta in deltas]
+        self._keyframe_interval = keyframe_interval
+        self._keyframes = {}
+
+    def __len__(self) -> int:
+        return len(self.deltas)
+
+    def get_orderbook_at(self, time: jtime) -> DayDetailsOrderBookDataRow | None:
+        """
+        returns the full orderbook as it was at the given time (None if there was no orderbook yet)
+        """
+
+        index = bisect_right(self._hevens, convert_jtime_to_heven(t=time)) - 1
+        if index < 0:
+            return None
+
+        return self._build_orderbook(index=index, levels=self._get_levels(index=index))
+
+    def iter_orderbook_data(self) -> Iterator[DayDetailsOrderBookDataRow]:
+        """
+        lazily yields the full orderbook after each delta
+        """
+
+        buy_rows = []
+        sell_rows = []
+        for index, delta in enumerate(self.deltas):
+            buy_rows = _core.apply_orderbook_levels(rows=buy_rows, levels=delta.buy_rows)
+            sell_rows = _core.apply_orderbook_levels(rows=sell_rows, levels=delta.sell_rows)
+            yield self._build_orderbook(index=index, levels=(buy_rows, sell_rows))
+
+    def _get_levels(self, index: int) -> tuple[list, list]:
+        # replay from the closest keyframe before index, keyframes are cached on the way
+        interval = self._keyframe_interval
+        position = index - index % interval
+        while position > 0 and position not in self._keyframes:
+            position -= interval
+
+        if position in self._keyframes:
+            buy_rows, sell_rows = self._keyframes[position]
+            start = position + 1
+        else:
+            buy_rows, sell_rows = [], []
+            start = 0
+
+        for i in range(start, index + 1):
+            buy_rows = _core.apply_orderbook_levels(rows=buy_rows, levels=self.deltas[i].buy_rows)
+            sell_rows = _core.apply_orderbook_levels(rows=sell_rows, levels=self.deltas[i].sell_rows)
+            if i % interval == 0:
+                self._keyframes[i] = (buy_rows, sell_rows)
+
+        return buy_rows, sell_rows
+
+    def _build_orderbook(self, index: int, levels: tuple[list, list]) -> DayDetailsOrderBookDataRow:
+        buy_rows, sell_rows = levels
+        return DayDetailsOrderBookDataRow(
+            time=self.deltas[index].time,
+            buy_rows=[row for row in buy_rows if row is not None],
+            sell_rows=[row for row in sell_rows if row is not None],
+        )
@@ -0,0 +1,116 @@
+from bisect import bisect_left, bisect_right
+
+from jdatetime import time as jtime
+
+from .orderbook import DayDetailsOrderBookDataRow, DayDetailsOrderBookRow
+from .price import DayDetailsPriceDataRow
+from ..utils import convert_jtime_to_heven, convert_hevens_to_jtimes
+
+
+def _seconds_to_heven(seconds: int) -> int:
+    minutes, second = divmod(seconds, 60)
+    hour, minute = divmod(minutes, 60)
+    return hour * 10000 + minute * 100 + second
+
+
+def _heven_to_seconds(heven: int) -> int:
+    minutes, second = divmod(heven, 100)
+    hour, minute = divmod(minutes, 100)
+    return hour * 3600 + minute * 60 + second
+
+
+class DayDetailsTimeIndex:
+    """
+    point in time lookups over price and orderbook data of a single day (sorted by time, binary searched)
+    """
+
+    def __init__(
+            self,
+            price_data: list[DayDetailsPriceDataRow] = None,
+            orderbook_data: list[DayDetailsOrderBookDataRow] = None,
+    ):
+        self._price_data = sorted(price_data or [], key=lambda row: convert_jtime_to_heven(t=row.time))
+        self._price_hevens = [convert_jtime_to_heven(t=row.time) for row in self._price_data]
+
+        self._orderbook_data = sorted(orderbook_data or [], key=lambda row: convert_jtime_to_heven(t=row.time))
+        self._orderbook_hevens = [convert_jtime_to_heven(t=row.time) for row in self._orderbook_data]
+
+    def get_price_at(self, time: jtime) -> DayDetailsPriceDataRow | None:
+        """
+        returns the last price row at or before the given time
+        """
+
+        index = bisect_right(self._price_hevens, convert_jtime_to_heven(t=time)) - 1
+        return self._price_data[index] if index >= 0 else None
+
+    def get_orderbook_at(self, time: jtime) -> DayDetailsOrderBookDataRow | None:
+        """
+        returns the last orderbook at or before the given time
+        """
+
+        index = bisect_right(self._orderbook_hevens, convert_jtime_to_heven(t=time)) - 1
+        return self._orderbook_data[index] if index >= 0 else None
+
+    def get_best_limits_at(self, time: jtime) -> tuple[DayDetailsOrderBookRow | None, DayDetailsOrderBookRow | None]:
+        """
+        returns best buy and best sell rows at the given time
+        """
+
+        orderbook = self.get_orderbook_at(time=time)
+        if orderbook is None:
+            return None, None
+
+        best_buy = orderbook.buy_rows[0] if orderbook.buy_rows else None
+        best_sell = orderbook.sell_rows[0] if orderbook.sell_rows else None
+        return best_buy, best_sell
+
+    def get_last_price_at(self, time: jtime) -> int | None:
+        price = self.get_price_at(time=time)
+        return price.last if price is not None else None
+
+    def get_price_range(self, start: jtime, end: jtime) -> list[DayDetailsPriceDataRow]:
+        """
+        returns price rows between start and end (both inclusive)
+        """
+
+        lo = bisect_left(self._price_hevens, convert_jtime_to_heven(t=start))
+        hi = bisect_right(self._price_hevens, convert_jtime_to_heven(t=end))
+        return self._price_data[lo:hi]
+
+    def get_orderbook_range(self, start: jtime, end: jtime) -> list[DayDetailsOrderBookDataRow]:
+        """
+        returns orderbooks between start and end (both inclusive)
+        """
+
+        lo = bisect_left(self._orderbook_hevens, convert_jtime_to_heven(t=start))
+        hi = bisect_right(self._orderbook_hevens, convert_jtime_to_heven(t=end))
+        return self._orderbook_data[lo:hi]
+
+    def resample_prices(self, interval: int, start: jtime = None, end: jtime = None) -> list[tuple[jtime, DayDetailsPriceDataRow | None]]:
+        """
+        returns the as-of price row every `interval` seconds between start and end (defaults to the whole day)
+        """
+
+        return [(t, self.get_price_at(time=t)) for t in self._get_grid(self._price_hevens, interval, start, end)]
+
+    def resample_orderbooks(self, interval: int, start: jtime = None, end: jtime = None) -> list[tuple[jtime, DayDetailsOrderBookDataRow | None]]:
+        """
+        returns the as-of orderbook every `interval` seconds between start and end (defaults to the whole day)
+        """
+
+        return [(t, self.get_orderbook_at(time=t)) for t in self._get_grid(self._orderbook_hevens, interval, start, end)]
+
+    @staticmethod
+    def _get_grid(hevens: list[int], interval: int, start: jtime | None, end: jtime | None) -> list[jtime]:
+        if interval <= 0:
+            raise ValueError('interval should be a positive number of seconds')
+
+        if (start is None or end is None) and not hevens:
+            return []
+
+        start_seconds = _heven_to_seconds(hevens[0] if start is None else convert_jtime_to_heven(t=start))
+        end_seconds = _heven_to_seconds(hevens[-1] if end is None else convert_jtime_to_heven(t=end))
+
+        return convert_hevens_to_jtimes(
+            _seconds_to_heven(seconds) for seconds in range(start_seconds, end_seconds + 1, interval)
+        )
@@ -1,4 +1,4 @@
-from ..utils import safe_request, aio_safe_request
+from ..utils import safe_request, aio_safe_request, aio_run_json_parser
 
 
 def get_market_map_data(map_type: int, heven: int = 0, response: dict = None) -> tuple[dict[dict], int]:
@@ -20,11 +20,12 @@ def get_market_map_data(map_type: int, heven: int = 0, response: dict = None) ->
         )
         response = response.json()
     
-    min_heven = 0
+    # rows changed after heven are returned, the next request continues from the newest of them
+    max_heven = heven
     watch_data = {}
     for row in response:
         symbol_id = row['insCode']
-        min_heven = min(row['hEven'], min_heven)
+        max_heven = max(row['hEven'], max_heven)
         watch_data[symbol_id] = {
             'symbol_id': row['insCode'],
             'color': row['color'],
@@ -40,7 +41,7 @@ def get_market_map_data(map_type: int, heven: int = 0, response: dict = None) ->
             'count': row['zTotTran'],
         }
 
-    return watch_data, min_heven
+    return watch_data, max_heven
 
 
 async def aio_get_market_map_data(map_type: int, heven: int = 0) -> tuple[dict[dict], int]:
@@ -59,5 +60,4 @@ async def aio_get_market_map_data(map_type: int, heven: int = 0) -> tuple[dict[d
         },
         verify=False
     )
-    response = await response.json()
-    return get_market_map_data(map_type=map_type, heven=heven, response=response)
+    return await aio_run_json_parser(get_market_map_data, response.text, None, map_type=map_type, heven=heven)
@@ -1,9 +1,10 @@
+from datetime import date
 from enum import Enum
 
 from pydantic import BaseModel
-from pydantic.utils import deep_update
 
 from . import _core
+from ..utils import aio_build_models
 
 
 class MapDataRow(BaseModel):
@@ -29,47 +30,80 @@ class MapType(Enum):
     MARKET_VOLUME = 2
 
 
-class MarketMap:
-    def __init__(self):
-        self._heven = 0
+def _build_map_data(raw_data: dict[str, dict]) -> dict[str, MapDataRow]:
+    return {key: MapDataRow(
+        symbol_id=data['symbol_id'],
+        symbol_short_name=data['symbol_short_name'],
+        symbol_long_name=data['symbol_long_name'],
+
+        close=data['close'],
+        last=data['last'],
+        volume=data['volume'],
+        value=data['value'],
+        count=data['count'],
 
-        self._last_map_data = {}
+        group_name=data['group_name'],
 
-    def get_market_map_data(self, map_type: MapType = MapType.MARKET_VALUE, raw_data: tuple[dict[dict], int] = None) -> dict[str, MapDataRow]:
+        color=data['color'],
+        price_change_percent=data['price_change_percent'],
+        percent=data['percent'],
+    ) for key, data in raw_data.items()}
+
+
+class MarketMap:
+    def __init__(self):
+        # incremental state is kept per map type, tile sizes (percent) differ between them
+        self._heven: dict[MapType, int] = {}
+
+        self._last_map_data: dict[MapType, dict[str, MapDataRow]] = {}
+        self._date = None
+
+    def get_market_map_data(
+            self,
+            map_type: MapType = MapType.MARKET_VALUE,
+            raw_data: tuple[dict[dict], int] = None,
+            changed_only: bool = False,
+    ) -> dict[str, MapDataRow]:
         """
         returns symbol data in market map (in "naghshe bazar" page)
+        after the first call only the tiles changed since the last call are downloaded and merged into the map,
+        changed_only returns just those tiles instead of the whole map
         !!! webserver occasionally throws 403 error, you should retry in a few seconds when this happens
         """
         
         if raw_data is None:
-            raw_data = _core.get_market_map_data(map_type=map_type.value, heven=self._heven)
+            raw_data = _core.get_market_map_data(map_type=map_type.value, heven=self._get_heven(map_type=map_type))
         raw_data, new_heven = raw_data
-        
-        self._last_map_data = deep_update(self._last_map_data, raw_data)
 
-        map_data = {key: MapDataRow(
-            symbol_id=data['symbol_id'],
-            symbol_short_name=data['symbol_short_name'],
-            symbol_long_name=data['symbol_long_name'],
+        return self._merge_map_data(
+            map_type=map_type, changed_data=_build_map_data(raw_data=raw_data), heven=new_heven, changed_only=changed_only,
+        )
 
-            close=data['close'],
-            last=data['last'],
-            volume=data['volume'],
-            value=data['value'],
-            count=data['count'],
+    def _get_heven(self, map_type: MapType) -> int:
+        self._reset_if_new_day()
+        return self._heven.get(map_type, 0)
 
-            group_name=data['group_name'],
+    def _reset_if_new_day(self):
+        # hevens restart every trading day, so a map from an earlier day is downloaded again from scratch
+        today = date.today().isoformat()
+        if self._date != today:
+            self._heven.clear()
+            self._last_map_data.clear()
+            self._date = today
 
-            color=data['color'],
-            price_change_percent=data['price_change_percent'],
-            percent=data['percent'],
-        ) for key, data in raw_data.items()}
+    def _merge_map_data(self, map_type: MapType, changed_data: dict[str, MapDataRow], heven: int, changed_only: bool) -> dict[str, MapDataRow]:
+        # also checked here, raw_data passed in by the caller does not go through _get_heven
+        self._reset_if_new_day()
 
-        return map_data
+        # rows of the response are complete, so unchanged tiles (and their models) are reused as they are
+        map_data = self._last_map_data.setdefault(map_type, {})
+        map_data.update(changed_data)
+        self._heven[map_type] = max(heven, self._heven.get(map_type, 0))
+
+        return changed_data if changed_only else dict(map_data)
     
-    async def aio_get_market_map_data(self, map_type: MapType = MapType.MARKET_VALUE) -> dict[str, MapDataRow]:
-        return self.get_market_map_data(
-            map_type=map_type,
-            raw_data=await _core.aio_get_market_map_data(map_type=map_type.value, heven=self._heven)
-        )
-        
\ No newline at end of file
+    async def aio_get_market_map_data(self, map_type: MapType = MapType.MARKET_VALUE, changed_only: bool = False) -> dict[str, MapDataRow]:
+        raw_data, new_heven = await _core.aio_get_market_map_data(map_type=map_type.value, heven=self._get_heven(map_type=map_type))
+        # only building the models (which is pure) may run on an executor, the map is merged here on the event loop
+        changed_data = await aio_build_models(_build_map_data, len(raw_data), raw_data=raw_data)
+        return self._merge_map_data(map_type=map_type, changed_data=changed_data, heven=new_heven, changed_only=changed_only)
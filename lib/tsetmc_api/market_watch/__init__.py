@@ -1 +1,2 @@
+from .snapshot import ConcurrentMarketWatch, MarketWatchSnapshot
 from .watch import MarketWatch
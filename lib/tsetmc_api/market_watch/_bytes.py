@@ -0,0 +1,281 @@
+"""
+single pass parsers for raw (undecoded) old.tsetmc.com responses
+
+these produce the same structures as the text parsers in _core, but never decode the whole body or split it into a
+list of all of its rows, rows are split out of small blocks of the body and fields are converted straight from bytes
+"""
+
+from array import array
+from collections import defaultdict
+from typing import Iterator
+
+# checking an int is much faster than a bytes substring in bytes.__contains__
+_DOT = ord('.')
+
+
+def _iter_row_blocks(response: bytes, start: int = 0, end: int = None, sep: bytes = b';', block_size: int = 1 << 16) -> Iterator[list[bytes]]:
+    # split blocks of about block_size bytes (cut at row boundaries) instead of the whole body at once
+    end = len(response) if end is None else end
+    pos = start
+    while pos < end:
+        block_end = min(pos + block_size, end)
+        if block_end < end:
+            cut = response.rfind(sep, pos, block_end)
+            if cut == -1:
+                cut = response.find(sep, block_end, end)
+            block_end = end if cut == -1 else cut
+
+        yield response[pos:block_end].split(sep)
+        pos = block_end + 1
+
+
+def _find_sections(response: bytes, count: int) -> list[tuple[int, int]]:
+    bounds = []
+    start = 0
+    for _ in range(count):
+        end = response.find(b'@', start)
+        if end == -1:
+            end = len(response)
+        bounds.append((start, end))
+        start = end + 1
+
+    return bounds
+
+
+def parse_watch_price_data(response: bytes) -> tuple[dict, int, int]:
+    sections = _find_sections(response, count=5)
+
+    max_heven = 0
+    watch_data = {}
+
+    # prices
+    start, end = sections[2]
+    for rows in _iter_row_blocks(response, start, end):
+        for row in rows:
+            if not row:
+                continue
+
+            cols = row.split(b',')
+            if len(cols) == 10:
+                continue
+
+            symbol_id = cols[0].decode()
+            heven = int(cols[4])
+            (
+                opn, close, last, count, volume, value, low, high, yesterday,
+            ) = map(int, cols[5:14])
+
+            watch_data[symbol_id] = {
+                'symbol_id': symbol_id,
+                'isin': cols[1].decode(),
+                'short_name': cols[2].decode(),
+                'full_name': cols[3].decode(),
+                'heven': heven,
+                'open': opn,
+                'close': close,
+                'last': last,
+                'count': count,
+                'volume': volume,
+                'value': value,
+                'low': low,
+                'high': high,
+                'yesterday': yesterday,
+                'eps': int(cols[14]) if cols[14] else None,
+                'base_volume': int(cols[15]),
+                'visit_count': int(cols[16]),
+                'flow': int(cols[17]),
+                'group': int(cols[18]),
+                'range_max': int(float(cols[19])),
+                'range_min': int(float(cols[20])),
+                'z': int(cols[21]),
+                'yval': int(cols[22]),
+                'orderbook': {
+                    'buy_rows': {},
+                    'sell_rows': {},
+                }
+            }
+
+            if heven > max_heven:
+                max_heven = heven
+
+    # orderbook
+    start, end = sections[3]
+    for rows in _iter_row_blocks(response, start, end):
+        for row in rows:
+            if not row:
+                continue
+
+            symbol_id, rank, s_count, b_count, b_price, s_price, b_volume, s_volume = row.split(b',')
+            symbol_id = symbol_id.decode()
+
+            if symbol_id not in watch_data:
+                watch_data[symbol_id] = {
+                    'orderbook': {
+                        'buy_rows': {},
+                        'sell_rows': {},
+                    }
+                }
+
+            watch_data[symbol_id]['orderbook']['buy_rows'][int(rank)] = {
+                'count': int(b_count),
+                'price': int(b_price),
+                'volume': int(b_volume),
+            }
+            watch_data[symbol_id]['orderbook']['sell_rows'][int(rank)] = {
+                'count': int(s_count),
+                'price': int(s_price),
+                'volume': int(s_volume),
+            }
+
+    # refid
+    start, end = sections[4]
+    refid = int(response[start:end])
+
+    return watch_data, refid, max_heven
+
+
+def parse_watch_daily_history_data(response: bytes) -> dict:
+    watch_data = defaultdict(list)
+
+    symbol_id = None
+    for rows in _iter_row_blocks(response):
+        for row in rows:
+            if not row:
+                continue
+
+            row = row.split(b',')
+
+            if len(row) == 11:
+                symbol_id = row[0].decode()
+                del row[0]
+
+            day, close, last, count, volume, value, low, high, yesterday, opn = map(int, row)
+            watch_data[symbol_id].append({
+                'day': day,
+                'close': close,
+                'last': last,
+                'count': count,
+                'volume': volume,
+                'value': value,
+                'low': low,
+                'high': high,
+                'yesterday': yesterday,
+                'open': opn,
+            })
+
+    return watch_data
+
+
+def parse_watch_raw_stats_data(response: bytes) -> dict:
+    ret = defaultdict(dict)
+
+    stats = None
+    for rows in _iter_row_blocks(response):
+        for row in rows:
+            if not row:
+                continue
+
+            r = row.split(b',')
+            if len(r) == 3:
+                stats = ret[r[0].decode()]
+                del r[0]
+            elif len(r) != 2 or stats is None:
+                # rows before the first symbol row have no symbol to belong to
+                continue
+
+            index, val = r
+            stats[int(index)] = int(val) if _DOT not in val else float(val)
+
+    return ret
+
+
+def parse_watch_stats_matrix_data(response: bytes, columns_count: int) -> tuple[list[str], array, array, array]:
+    empty_row = array('d', [float('nan')]) * columns_count
+    empty_int_row = array('q', [0]) * columns_count
+    empty_mask_row = array('b', [0]) * columns_count
+    symbol_ids = []
+    symbol_rows = {}
+    values = array('d')
+    int_values = array('q')
+    int_mask = array('b')
+    offset = None
+    for rows in _iter_row_blocks(response):
+        for row in rows:
+            if not row:
+                continue
+
+            r = row.split(b',')
+            if len(r) == 3:
+                symbol_id = r[0].decode()
+                if symbol_id not in symbol_rows:
+                    symbol_rows[symbol_id] = len(symbol_ids)
+                    symbol_ids.append(symbol_id)
+                    values.extend(empty_row)
+                    int_values.extend(empty_int_row)
+                    int_mask.extend(empty_mask_row)
+                offset = symbol_rows[symbol_id] * columns_count
+                del r[0]
+            elif len(r) != 2 or offset is None:
+                continue
+
+            index = int(r[0])
+            if 1 <= index <= columns_count:
+                cell = offset + index - 1
+                if _DOT not in r[1]:
+                    int_values[cell] = int(r[1])
+                    int_mask[cell] = 1
+                else:
+                    int_mask[cell] = 0
+                values[cell] = float(r[1])
+
+    return symbol_ids, values, int_values, int_mask
+
+
+def parse_watch_daily_history_panel_data(response: bytes, fields: tuple[str, ...]) -> tuple[list[str], list[int], dict[str, array], array]:
+    # rows (day and fields) are collected into one flat array first, the panel is scattered once all days are known
+    symbol_ids = []
+    symbol_indexes = {}
+    symbol_rows = array('q')
+    values = array('q')
+
+    width = len(fields) + 1
+    symbol_row = None
+    for rows in _iter_row_blocks(response):
+        for row in rows:
+            if not row:
+                continue
+
+            row = row.split(b',')
+
+            if len(row) == width + 1:
+                symbol_id = row[0].decode()
+                if symbol_id not in symbol_indexes:
+                    symbol_indexes[symbol_id] = len(symbol_ids)
+                    symbol_ids.append(symbol_id)
+                symbol_row = symbol_indexes[symbol_id]
+                del row[0]
+            elif symbol_row is None or len(row) != width:
+                # values are stored at fixed strides, a row with missing or extra fields would shift all later ones
+                continue
+
+            symbol_rows.append(symbol_row)
+            values.extend(map(int, row))
+
+    days = values[::width]
+    day_values = sorted(set(days))
+    day_indexes = {day: index for index, day in enumerate(day_values)}
+    size = len(symbol_ids) * len(day_values)
+    offsets = [symbol_row * len(day_values) + day_indexes[day] for symbol_row, day in zip(symbol_rows, days)]
+
+    panel = {}
+    for index, field in enumerate(fields, start=1):
+        field_values = array('q', bytes(8 * size))
+        for offset, val in zip(offsets, values[index::width]):
+            field_values[offset] = val
+        panel[field] = field_values
+
+    available = array('b', bytes(size))
+    for offset in offsets:
+        available[offset] = 1
+
+    return symbol_ids, day_values, panel, available
@@ -1,6 +1,8 @@
+from array import array
 from collections import defaultdict
 
-from ..utils import safe_request, aio_safe_request
+from . import _bytes
+from ..utils import safe_request, aio_safe_request, aio_run_parser
 
 _STATS_TRADES_INDICES = {
     1: 'average_value_3_month',  # میانگین ارزش معاملات در 3 ماه گذشته
@@ -118,8 +120,32 @@ _STATS_CLIENT_TYPE_INDICES = {
     89: 'total_sell_average_count_rank_12_month',  # رتبه تعداد فروشندگان در 12 ماه گذشته
 }
 
+_STATS_SECTIONS = {
+    'trades': _STATS_TRADES_INDICES,
+    'negative_days': _STATS_NEGATIVE_DAYS_INDICES,
+    'no_trade_days': _STATS_NO_TRADE_DAYS_INDICES,
+    'positive_days': _STATS_POSITIVE_DAYS_INDICES,
+    'with_trade_days': _STATS_WITH_TRADE_DAYS_INDICES,
+    'company_value': _STATS_COMPANY_VALUE_INDICES,
+    'open_days': _STATS_OPEN_DAYS_INDICES,
+    'closed_days': _STATS_CLOSED_DAYS_INDICES,
+    'client_type': _STATS_CLIENT_TYPE_INDICES,
+}
+
+STATS_COLUMNS_COUNT = 89
+
+# order of the fields after the day in ClosingPriceAll.aspx rows
+DAILY_HISTORY_FIELDS = ('close', 'last', 'count', 'volume', 'value', 'low', 'high', 'yesterday', 'open')
+
+# stats index -> (section name, stat name)
+STATS_INDEX_NAMES = {
+    index: (sub_name, name)
+    for sub_name, indices_obj in _STATS_SECTIONS.items()
+    for index, name in indices_obj.items()
+}
 
-def get_watch_price_data(refid: int = 0, heven: int = 0, response: str = None) -> tuple[dict, int, int]:
+
+def get_watch_price_data(refid: int = 0, heven: int = 0, response: str | bytes = None) -> tuple[dict, int, int]:
     if response is None:
         response = safe_request(
             method='GET',
@@ -130,8 +156,11 @@ def get_watch_price_data(refid: int = 0, heven: int = 0, response: str = None) -
             },
             verify=False
         )
-        response = response.text
+        response = response.content
     
+    if isinstance(response, bytes):
+        return _bytes.parse_watch_price_data(response=response)
+
     sections = response.split('@')
 
     max_heven = 0
@@ -265,7 +294,7 @@ def get_watch_traders_type_data(response: str = None) -> dict:
     return watch_data
 
 
-def get_watch_daily_history_data(response: str = None) -> dict:
+def get_watch_daily_history_data(response: str | bytes = None) -> dict:
     if response is None:
         # http is force redirected to https and its better to send request to https right away
         response = safe_request(
@@ -273,8 +302,11 @@ def get_watch_daily_history_data(response: str = None) -> dict:
             url='https://members.tsetmc.com/tsev2/data/ClosingPriceAll.aspx',
             params={}
         )
-        response = response.text
+        response = response.content
     
+    if isinstance(response, bytes):
+        return _bytes.parse_watch_daily_history_data(response=response)
+
     watch_data = defaultdict(list)
 
     symbol_id = None
@@ -306,7 +338,28 @@ def get_watch_daily_history_data(response: str = None) -> dict:
     return watch_data
 
 
-def get_watch_raw_stats_data(response: str = None) -> dict:
+def get_watch_daily_history_panel_data(response: str | bytes = None) -> tuple[list[str], list[int], dict[str, array], array]:
+    """
+    parses daily history of all symbols into symbols x days int64 arrays (row major) for each field, also returns
+    an int8 array of the same shape marking which cells had data (missing cells are 0 in every field)
+    """
+
+    if response is None:
+        # http is force redirected to https and its better to send request to https right away
+        response = safe_request(
+            method='GET',
+            url='https://members.tsetmc.com/tsev2/data/ClosingPriceAll.aspx',
+            params={}
+        )
+        response = response.content
+
+    if isinstance(response, str):
+        response = response.encode()
+
+    return _bytes.parse_watch_daily_history_panel_data(response=response, fields=DAILY_HISTORY_FIELDS)
+
+
+def get_watch_raw_stats_data(response: str | bytes = None) -> dict:
     if response is None:
         response = safe_request(
             method='GET',
@@ -314,8 +367,11 @@ def get_watch_raw_stats_data(response: str = None) -> dict:
             params={},
             verify=False
         )
-        response = response.text
+        response = response.content
     
+    if isinstance(response, bytes):
+        return _bytes.parse_watch_raw_stats_data(response=response)
+
     symbol_id = None
     ret = defaultdict(dict)
     sections = response.split(';')
@@ -324,6 +380,9 @@ def get_watch_raw_stats_data(response: str = None) -> dict:
         if len(r) == 3:
             symbol_id = r[0]
             r = r[1:]
+        elif len(r) != 2 or symbol_id is None:
+            # rows before the first symbol row have no symbol to belong to
+            continue
 
         index = int(r[0])
         val = int(r[1]) if '.' not in r[1] else float(r[1])
@@ -334,57 +393,77 @@ def get_watch_raw_stats_data(response: str = None) -> dict:
 
 
 def get_watch_stats_data(raw_stats: dict = None) -> dict:
-    raw_stats = raw_stats or get_watch_raw_stats_data()
+    if raw_stats is None:
+        raw_stats = get_watch_raw_stats_data()
     
     ret = {}
     for symbol_id, stats in raw_stats.items():
-        ret[symbol_id] = {
-            'trades': {},
-            'negative_days': {},
-            'no_trade_days': {},
-            'positive_days': {},
-            'with_trade_days': {},
-            'company_value': {},
-            'open_days': {},
-            'closed_days': {},
-            'client_type': {},
-        }
+        ret[symbol_id] = {sub_name: {} for sub_name in _STATS_SECTIONS}
         for index, val in stats.items():
-            if 1 <= index < 18:
-                sub_name = 'trades'
-                indices_obj = _STATS_TRADES_INDICES
-            elif 18 <= index < 24:
-                sub_name = 'negative_days'
-                indices_obj = _STATS_NEGATIVE_DAYS_INDICES
-            elif 24 <= index < 26:
-                sub_name = 'no_trade_days'
-                indices_obj = _STATS_NO_TRADE_DAYS_INDICES
-            elif 26 <= index < 32:
-                sub_name = 'positive_days'
-                indices_obj = _STATS_POSITIVE_DAYS_INDICES
-            elif 32 <= index < 36:
-                sub_name = 'with_trade_days'
-                indices_obj = _STATS_WITH_TRADE_DAYS_INDICES
-            elif 36 <= index < 38:
-                sub_name = 'company_value'
-                indices_obj = _STATS_COMPANY_VALUE_INDICES
-            elif 38 <= index < 44:
-                sub_name = 'open_days'
-                indices_obj = _STATS_OPEN_DAYS_INDICES
-            elif 44 <= index < 50:
-                sub_name = 'closed_days'
-                indices_obj = _STATS_CLOSED_DAYS_INDICES
-            elif 50 <= index < 90:
-                sub_name = 'client_type'
-                indices_obj = _STATS_CLIENT_TYPE_INDICES
-            else:
+            if index not in STATS_INDEX_NAMES:
                 continue
 
-            ret[symbol_id][sub_name][indices_obj[index]] = val
+            sub_name, name = STATS_INDEX_NAMES[index]
+            ret[symbol_id][sub_name][name] = val
 
     return ret
 
 
+def get_watch_stats_matrix_data(response: str | bytes = None) -> tuple[list[str], array, array, array]:
+    """
+    parses stats into flat row major arrays of symbols x 89 stats: float64 values (missing stats are nan), the exact
+    int64 values of stats sent as integers and a mask of which stats were sent as integers
+    """
+
+    if response is None:
+        response = safe_request(
+            method='GET',
+            url='http://old.tsetmc.com/tsev2/data/InstValue.aspx?t=a',
+            params={},
+            verify=False
+        )
+        response = response.content
+
+    if isinstance(response, bytes):
+        return _bytes.parse_watch_stats_matrix_data(response=response, columns_count=STATS_COLUMNS_COUNT)
+
+    empty_row = array('d', [float('nan')]) * STATS_COLUMNS_COUNT
+    empty_int_row = array('q', [0]) * STATS_COLUMNS_COUNT
+    empty_mask_row = array('b', [0]) * STATS_COLUMNS_COUNT
+    symbol_ids = []
+    symbol_rows = {}
+    values = array('d')
+    int_values = array('q')
+    int_mask = array('b')
+    offset = 0
+    for section in response.split(';'):
+        r = section.split(',')
+        if len(r) == 3:
+            symbol_id = r[0]
+            if symbol_id not in symbol_rows:
+                symbol_rows[symbol_id] = len(symbol_ids)
+                symbol_ids.append(symbol_id)
+                values.extend(empty_row)
+                int_values.extend(empty_int_row)
+                int_mask.extend(empty_mask_row)
+            offset = symbol_rows[symbol_id] * STATS_COLUMNS_COUNT
+            r = r[1:]
+        elif len(r) != 2 or not symbol_ids:
+            continue
+
+        index = int(r[0])
+        if 1 <= index <= STATS_COLUMNS_COUNT:
+            cell = offset + index - 1
+            if '.' not in r[1]:
+                int_values[cell] = int(r[1])
+                int_mask[cell] = 1
+            else:
+                int_mask[cell] = 0
+            values[cell] = float(r[1])
+
+    return symbol_ids, values, int_values, int_mask
+
+
 async def aio_get_watch_price_data(refid: int = 0, heven: int = 0) -> tuple[dict, int, int]:
     response = await aio_safe_request(
         method='GET',
@@ -395,8 +474,8 @@ async def aio_get_watch_price_data(refid: int = 0, heven: int = 0) -> tuple[dict
         },
         verify=False
     )
-    response = response.text
-    return get_watch_price_data(refid=refid, heven=heven, response=response)
+    response = await response.read()
+    return await aio_run_parser(get_watch_price_data, len(response), refid=refid, heven=heven, response=response)
 
 
 async def aio_get_watch_traders_type_data() -> dict:
@@ -407,7 +486,7 @@ async def aio_get_watch_traders_type_data() -> dict:
         verify=False
     )
     response = response.text
-    return get_watch_traders_type_data(response=response)
+    return await aio_run_parser(get_watch_traders_type_data, len(response), response=response)
 
 
 async def aio_get_watch_daily_history_data() -> dict:
@@ -417,8 +496,19 @@ async def aio_get_watch_daily_history_data() -> dict:
         url='https://members.tsetmc.com/tsev2/data/ClosingPriceAll.aspx',
         params={}
     )
-    response = response.text
-    return get_watch_daily_history_data(response=response)
+    response = await response.read()
+    return await aio_run_parser(get_watch_daily_history_data, len(response), response=response)
+
+
+async def aio_get_watch_daily_history_panel_data() -> tuple[list[str], list[int], dict[str, array], array]:
+    # http is force redirected to https and its better to send request to https right away
+    response = await aio_safe_request(
+        method='GET',
+        url='https://members.tsetmc.com/tsev2/data/ClosingPriceAll.aspx',
+        params={}
+    )
+    response = await response.read()
+    return await aio_run_parser(get_watch_daily_history_panel_data, len(response), response=response)
 
 
 async def aio_get_watch_raw_stats_data() -> dict:
@@ -428,9 +518,20 @@ async def aio_get_watch_raw_stats_data() -> dict:
         params={},
         verify=False
     )
-    response = response.text
-    return get_watch_raw_stats_data(response=response)
+    response = await response.read()
+    return await aio_run_parser(get_watch_raw_stats_data, len(response), response=response)
 
 
 async def aio_get_watch_stats_data() -> dict:
     return get_watch_stats_data(raw_stats=await aio_get_watch_raw_stats_data())
+
+
+async def aio_get_watch_stats_matrix_data() -> tuple[list[str], array, array, array]:
+    response = await aio_safe_request(
+        method='GET',
+        url='http://old.tsetmc.com/tsev2/data/InstValue.aspx?t=a',
+        params={},
+        verify=False
+    )
+    response = await response.read()
+    return await aio_run_parser(get_watch_stats_matrix_data, len(response), response=response)
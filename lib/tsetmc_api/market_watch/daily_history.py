@@ -1,5 +1,10 @@
+from array import array
+
 from pydantic import BaseModel
 
+from . import _core
+from ..utils import import_numpy
+
 
 class WatchDailyHistoryDataRow(BaseModel):
     day: int
@@ -12,3 +17,78 @@ class WatchDailyHistoryDataRow(BaseModel):
     low: int
     high: int
     yesterday: int
+
+
+class WatchDailyHistoryPanel:
+    """
+    daily history of all symbols as flat row major int64 arrays (symbols x days) for each field,
+    days are sorted by their day value and cells without data are 0 (see has_data)
+    """
+
+    FIELDS = _core.DAILY_HISTORY_FIELDS
+
+    def __init__(self, symbol_ids: list[str], days: list[int], fields: dict[str, array], available: array):
+        self.symbol_ids = symbol_ids
+        self.days = days
+        self.fields = fields
+        self.available = available
+        self._symbol_rows = {symbol_id: row for row, symbol_id in enumerate(symbol_ids)}
+        self._day_columns = {day: column for column, day in enumerate(days)}
+
+    def __len__(self) -> int:
+        return len(self.symbol_ids)
+
+    def __contains__(self, symbol_id: str) -> bool:
+        return symbol_id in self._symbol_rows
+
+    def has_data(self, symbol_id: str, day: int) -> bool:
+        return bool(self.available[self._get_offset(symbol_id=symbol_id, day=day)])
+
+    def get_value(self, symbol_id: str, field: str, day: int) -> int | None:
+        """
+        returns a single field of a symbol in a day (None if the symbol has no data for that day)
+        """
+
+        offset = self._get_offset(symbol_id=symbol_id, day=day)
+        return self.fields[field][offset] if self.available[offset] else None
+
+    def get_series(self, symbol_id: str, field: str) -> memoryview:
+        """
+        returns a field of a symbol for all days (a view over the panel, not a copy)
+        """
+
+        start = self._symbol_rows[symbol_id] * len(self.days)
+        return memoryview(self.fields[field])[start:start + len(self.days)]
+
+    def get_cross_section(self, field: str, day: int) -> array:
+        """
+        returns a field of all symbols in a day, in the order of symbol_ids
+        """
+
+        return self.fields[field][self._day_columns[day]::len(self.days)]
+
+    def get_rows(self, symbol_id: str) -> list[WatchDailyHistoryDataRow]:
+        """
+        builds the rows returned by MarketWatch.get_daily_history_data for a single symbol
+        """
+
+        rows = []
+        for day in self.days:
+            offset = self._get_offset(symbol_id=symbol_id, day=day)
+            if not self.available[offset]:
+                continue
+            rows.append(WatchDailyHistoryDataRow(day=day, **{field: self.fields[field][offset] for field in self.FIELDS}))
+
+        return rows
+
+    def to_numpy(self, field: str):
+        """
+        returns a field as a (symbols x days) numpy array sharing memory with this object (numpy should be installed)
+        """
+
+        numpy = import_numpy()
+
+        return numpy.frombuffer(self.fields[field], dtype=numpy.int64).reshape(len(self.symbol_ids), len(self.days))
+
+    def _get_offset(self, symbol_id: str, day: int) -> int:
+        return self._symbol_rows[symbol_id] * len(self.days) + self._day_columns[day]
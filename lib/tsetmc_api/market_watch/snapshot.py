@@ -0,0 +1,151 @@
+from collections.abc import Mapping
+from threading import Lock
+from typing import Iterator
+
+from . import _core
+from .orderbook import WatchOrderBook, WatchOrderBookRow
+from .price import WatchPriceDataRow
+from ..utils import deep_update, aio_build_models
+
+
+class FrozenWatchOrderBookRow(WatchOrderBookRow):
+    class Config:
+        allow_mutation = False
+
+
+class FrozenWatchOrderBook(WatchOrderBook):
+    buy_rows: tuple[FrozenWatchOrderBookRow, ...]
+    sell_rows: tuple[FrozenWatchOrderBookRow, ...]
+
+    class Config:
+        allow_mutation = False
+
+
+class FrozenWatchPriceDataRow(WatchPriceDataRow):
+    """
+    a WatchPriceDataRow that can not be changed (rows are shared by snapshots and all their readers)
+    """
+
+    orderbook: FrozenWatchOrderBook
+
+    class Config:
+        allow_mutation = False
+
+
+def _build_frozen_rows(raw_rows: dict[str, dict]) -> dict[str, FrozenWatchPriceDataRow]:
+    rows = {}
+    for symbol_id, data in raw_rows.items():
+        # delta rows of symbols that only changed their orderbook before their first full row have no price data
+        if 'symbol_id' not in data:
+            continue
+
+        orderbook = data['orderbook']
+        rows[symbol_id] = FrozenWatchPriceDataRow(**{
+            **data,
+            'orderbook': {
+                'buy_rows': tuple(orderbook['buy_rows'].values()),
+                'sell_rows': tuple(orderbook['sell_rows'].values()),
+            },
+        })
+
+    return rows
+
+
+class MarketWatchSnapshot(Mapping):
+    """
+    an immutable view of market watch price data (symbol id -> WatchPriceDataRow) as of one refid/heven,
+    consecutive snapshots share the rows (and merged raw rows) of symbols that did not change
+    """
+
+    __slots__ = ('_rows', '_raw_rows', '_refid', '_heven')
+
+    def __init__(self, rows: dict[str, FrozenWatchPriceDataRow], raw_rows: dict[str, dict], refid: int, heven: int):
+        self._rows = rows
+        self._raw_rows = raw_rows
+        self._refid = refid
+        self._heven = heven
+
+    @property
+    def refid(self) -> int:
+        return self._refid
+
+    @property
+    def heven(self) -> int:
+        return self._heven
+
+    def __getitem__(self, symbol_id: str) -> FrozenWatchPriceDataRow:
+        return self._rows[symbol_id]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._rows)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, symbol_id) -> bool:
+        return symbol_id in self._rows
+
+
+class ConcurrentMarketWatch:
+    """
+    market watch price data for one poller and many reader threads, every update publishes a new MarketWatchSnapshot
+    by replacing a single attribute, readers take `snapshot` once and get a consistent view without locks or copies
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._snapshot = MarketWatchSnapshot(rows={}, raw_rows={}, refid=0, heven=0)
+
+    @property
+    def snapshot(self) -> MarketWatchSnapshot:
+        return self._snapshot
+
+    def update(self, raw_data: tuple[dict, int, int] = None) -> MarketWatchSnapshot:
+        """
+        fetches the changes since the current snapshot and publishes (and returns) the next one
+        """
+
+        snapshot = self._snapshot
+        if raw_data is None:
+            raw_data = _core.get_watch_price_data(refid=snapshot.refid, heven=snapshot.heven)
+
+        changed_raw_rows = self._merge_raw_rows(base=snapshot, delta=raw_data[0])
+        changed_rows = _build_frozen_rows(raw_rows=changed_raw_rows)
+        return self._publish(base=snapshot, raw_data=raw_data, changed_raw_rows=changed_raw_rows, changed_rows=changed_rows)
+
+    async def aio_update(self) -> MarketWatchSnapshot:
+        snapshot = self._snapshot
+        raw_data = await _core.aio_get_watch_price_data(refid=snapshot.refid, heven=snapshot.heven)
+        changed_raw_rows = self._merge_raw_rows(base=snapshot, delta=raw_data[0])
+        # building the models is pure and may run on an executor, the snapshot is published here on the event loop
+        changed_rows = await aio_build_models(_build_frozen_rows, len(changed_raw_rows), raw_rows=changed_raw_rows)
+        return self._publish(base=snapshot, raw_data=raw_data, changed_raw_rows=changed_raw_rows, changed_rows=changed_rows)
+
+    @staticmethod
+    def _merge_raw_rows(base: MarketWatchSnapshot, delta: dict[str, dict]) -> dict[str, dict]:
+        # deep_update returns new dicts, raw rows of the base snapshot are left untouched
+        return {symbol_id: deep_update(base._raw_rows.get(symbol_id, {}), data) for symbol_id, data in delta.items()}
+
+    def _publish(
+            self,
+            base: MarketWatchSnapshot,
+            raw_data: tuple[dict, int, int],
+            changed_raw_rows: dict[str, dict],
+            changed_rows: dict[str, FrozenWatchPriceDataRow],
+    ) -> MarketWatchSnapshot:
+        # requests are sent without the lock, a delta fetched against an already replaced snapshot is dropped
+        with self._lock:
+            if self._snapshot is not base:
+                return self._snapshot
+
+            _, refid, heven = raw_data
+
+            # only the outer dicts are copied, unchanged symbols keep the objects of the previous snapshot
+            rows = {**base._rows, **changed_rows}
+            raw_rows = {**base._raw_rows, **changed_raw_rows}
+
+            # deltas with only orderbook changes have no heven
+            heven = heven or base.heven
+
+            self._snapshot = MarketWatchSnapshot(rows=rows, raw_rows=raw_rows, refid=refid, heven=heven)
+            return self._snapshot
@@ -0,0 +1,94 @@
+from array import array
+from math import isnan
+
+from . import _core
+from ..utils import import_numpy
+
+
+class WatchStatsMatrix:
+    """
+    stats of all symbols as a flat row major float64 array (symbols x 89 stats, missing stats are nan)
+    columns are named like "trades.average_value_3_month" (section name and stat name),
+    stats sent as integers are also kept as exact int64 values (int_values, where int_mask is set)
+    """
+
+    COLUMNS = {
+        f'{sub_name}.{name}': index - 1
+        for index, (sub_name, name) in sorted(_core.STATS_INDEX_NAMES.items())
+    }
+
+    def __init__(self, symbol_ids: list[str], values: array, int_values: array, int_mask: array):
+        self.symbol_ids = symbol_ids
+        self.values = values
+        self.int_values = int_values
+        self.int_mask = int_mask
+        self._symbol_rows = {symbol_id: row for row, symbol_id in enumerate(symbol_ids)}
+
+    def __len__(self) -> int:
+        return len(self.symbol_ids)
+
+    def __contains__(self, symbol_id: str) -> bool:
+        return symbol_id in self._symbol_rows
+
+    def get_value(self, symbol_id: str, column: str | int) -> int | float | None:
+        """
+        returns a single stat of a symbol (column is either a column name or the tsetmc stat index)
+        """
+
+        return self._get_cell(self._symbol_rows[symbol_id] * _core.STATS_COLUMNS_COUNT + self._get_column_offset(column))
+
+    def get_row(self, symbol_id: str) -> memoryview:
+        """
+        returns all stats of a symbol (a view over the matrix, not a copy)
+        """
+
+        start = self._symbol_rows[symbol_id] * _core.STATS_COLUMNS_COUNT
+        return memoryview(self.values)[start:start + _core.STATS_COLUMNS_COUNT]
+
+    def get_column(self, column: str | int) -> array:
+        """
+        returns a stat for all symbols, in the order of symbol_ids
+        """
+
+        return self.values[self._get_column_offset(column)::_core.STATS_COLUMNS_COUNT]
+
+    def to_numpy(self):
+        """
+        returns the matrix as a (symbols x 89) numpy array sharing memory with this object (numpy should be installed)
+        """
+
+        numpy = import_numpy()
+
+        return numpy.frombuffer(self.values, dtype=numpy.float64).reshape(len(self.symbol_ids), _core.STATS_COLUMNS_COUNT)
+
+    def get_stats_data(self, symbol_id: str = None) -> dict[dict]:
+        """
+        builds the nested dict view returned by MarketWatch.get_stats_data (for one symbol or all of them)
+        """
+
+        symbol_ids = self.symbol_ids if symbol_id is None else [symbol_id]
+        raw_stats = {}
+        for s_id in symbol_ids:
+            raw_stats[s_id] = {}
+            start = self._symbol_rows[s_id] * _core.STATS_COLUMNS_COUNT
+            for offset in range(_core.STATS_COLUMNS_COUNT):
+                value = self._get_cell(start + offset)
+                if value is not None:
+                    raw_stats[s_id][offset + 1] = value
+
+        return _core.get_watch_stats_data(raw_stats=raw_stats)
+
+    def _get_cell(self, cell: int) -> int | float | None:
+        if self.int_mask[cell]:
+            return self.int_values[cell]
+
+        value = self.values[cell]
+        return None if isnan(value) else value
+
+    def _get_column_offset(self, column: str | int) -> int:
+        if isinstance(column, int):
+            if not 1 <= column <= _core.STATS_COLUMNS_COUNT:
+                raise IndexError(f'stat index should be between 1 and {_core.STATS_COLUMNS_COUNT}')
+            return column - 1
+
+        return self.COLUMNS[column]
@@ -1,16 +1,136 @@
+import json
+import os
+import time
+from array import array
+from datetime import date
+
 from . import _core
-from .daily_history import WatchDailyHistoryDataRow
+from .daily_history import WatchDailyHistoryDataRow, WatchDailyHistoryPanel
 from .orderbook import WatchOrderBook, WatchOrderBookRow
 from .price import WatchPriceDataRow
+from .stats import WatchStatsMatrix
 from .traders_type import WatchTradersTypeDataRow, WatchTradersTypeInfo, WatchTradersTypeSubInfo
-from ..utils import deep_update
+from ..utils import deep_update, aio_build_models
+
+
+def _build_price_data_row(data: dict) -> WatchPriceDataRow:
+    return WatchPriceDataRow(
+        symbol_id=data['symbol_id'],
+        isin=data['isin'],
+        short_name=data['short_name'],
+        full_name=data['full_name'],
+        heven=data['heven'],
+        open=data['open'],
+        close=data['close'],
+        last=data['last'],
+        count=data['count'],
+        volume=data['volume'],
+        value=data['value'],
+        low=data['low'],
+        high=data['high'],
+        yesterday=data['yesterday'],
+        eps=data['eps'],
+        base_volume=data['base_volume'],
+        visit_count=data['visit_count'],
+        flow=data['flow'],
+        group=data['group'],
+        range_max=data['range_max'],
+        range_min=data['range_min'],
+        z=data['z'],
+        yval=data['yval'],
+        orderbook=WatchOrderBook(
+            buy_rows=[WatchOrderBookRow(
+                count=row['count'],
+                price=row['price'],
+                volume=row['volume'],
+            ) for row in data['orderbook']['buy_rows'].values()],
+            sell_rows=[WatchOrderBookRow(
+                count=row['count'],
+                price=row['price'],
+                volume=row['volume'],
+            ) for row in data['orderbook']['sell_rows'].values()],
+        )
+    )
+
+
+def _build_price_data(price_data: dict[str, dict]) -> dict[str, WatchPriceDataRow]:
+    watch_data = {}
+    for symbol_id, data in price_data.items():
+        if 'symbol_id' not in data:
+            continue
+        
+        watch_data[symbol_id] = _build_price_data_row(data=data)
+    
+    return watch_data
 
 
 class MarketWatch:
+    STATE_VERSION = 1
+    
     def __init__(self):
         self._heven = 0
         self._refid = 0
         self._last_price_data = {}
+    
+    def save_state(self, path: str):
+        """
+        writes the incremental price data state (merged rows, refid and heven) as json (atomically replacing the old file)
+        so a restarted process can continue with delta requests, see load_state
+        """
+        
+        state = {
+            'version': self.STATE_VERSION,
+            'saved_at': time.time(),
+            'date': date.today().isoformat(),
+            'refid': self._refid,
+            'heven': self._heven,
+            'price_data': self._last_price_data,
+        }
+        
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    
+    def load_state(self, path: str, max_age: float = 600) -> bool:
+        """
+        restores a state written by save_state, returns False (and leaves the current state untouched) if the file is
+        missing, broken, from another day or older than max_age seconds
+        """
+        
+        # the file is validated into locals first, state is only replaced when all of it is valid
+        try:
+            with open(path, encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return False
+        
+        try:
+            if (
+                    state['version'] != self.STATE_VERSION or
+                    state['date'] != date.today().isoformat() or
+                    not 0 <= time.time() - state['saved_at'] <= max_age
+            ):
+                return False
+            
+            price_data = state['price_data']
+            # json turns orderbook ranks into strings, they have to be ints again to be merged with deltas
+            for data in price_data.values():
+                orderbook = data['orderbook']
+                for side in ('buy_rows', 'sell_rows'):
+                    orderbook[side] = {int(rank): row for rank, row in orderbook[side].items()}
+            
+            refid = int(state['refid'])
+            heven = int(state['heven'])
+        except (KeyError, TypeError, ValueError, AttributeError):
+            # valid json without the structure save_state writes
+            return False
+        
+        self._last_price_data = price_data
+        self._refid = refid
+        self._heven = heven
+        
+        return True
 
     def get_price_data(self, raw_data: tuple[dict, int, int] = None) -> dict[str, WatchPriceDataRow]:
         """
@@ -19,59 +139,18 @@ class MarketWatch:
         
         if raw_data is None:
             raw_data = _core.get_watch_price_data(refid=self._refid, heven=self._heven)
+        
+        return _build_price_data(price_data=self._merge_price_data(raw_data=raw_data))
+    
+    def _merge_price_data(self, raw_data: tuple[dict, int, int]) -> dict[str, dict]:
         raw_data, new_refid, new_heven, = raw_data
         
+        # deep_update returns a new dict, so the returned merged data is never changed by later merges
         self._last_price_data = deep_update(self._last_price_data, raw_data)
-        
-        watch_data = {}
-        for symbol_id in self._last_price_data.keys():
-            data = self._last_price_data[symbol_id]
-            
-            if 'symbol_id' not in data:
-                continue
-            
-            watch_data[symbol_id] = WatchPriceDataRow(
-                symbol_id=data['symbol_id'],
-                isin=data['isin'],
-                short_name=data['short_name'],
-                full_name=data['full_name'],
-                heven=data['heven'],
-                open=data['open'],
-                close=data['close'],
-                last=data['last'],
-                count=data['count'],
-                volume=data['volume'],
-                value=data['value'],
-                low=data['low'],
-                high=data['high'],
-                yesterday=data['yesterday'],
-                eps=data['eps'],
-                base_volume=data['base_volume'],
-                visit_count=data['visit_count'],
-                flow=data['flow'],
-                group=data['group'],
-                range_max=data['range_max'],
-                range_min=data['range_min'],
-                z=data['z'],
-                yval=data['yval'],
-                orderbook=WatchOrderBook(
-                    buy_rows=[WatchOrderBookRow(
-                        count=row['count'],
-                        price=row['price'],
-                        volume=row['volume'],
-                    ) for row in data['orderbook']['buy_rows'].values()],
-                    sell_rows=[WatchOrderBookRow(
-                        count=row['count'],
-                        price=row['price'],
-                        volume=row['volume'],
-                    ) for row in data['orderbook']['sell_rows'].values()],
-                )
-            )
-        
         self._heven = new_heven
         self._refid = new_refid
         
-        return watch_data
+        return self._last_price_data
     
     def get_traders_type_data(self, raw_data: dict = None) -> dict[str, WatchTradersTypeDataRow]:
         """
@@ -133,6 +212,17 @@ class MarketWatch:
         
         return watch_data
     
+    def get_daily_history_panel(self, raw_data: tuple[list[str], list[int], dict[str, array], array] = None) -> WatchDailyHistoryPanel:
+        """
+        returns 30 day history of all symbols as symbols x days arrays per field (no per row objects are built)
+        """
+        
+        if raw_data is None:
+            raw_data = _core.get_watch_daily_history_panel_data()
+        symbol_ids, days, fields, available = raw_data
+        
+        return WatchDailyHistoryPanel(symbol_ids=symbol_ids, days=days, fields=fields, available=available)
+    
     def get_raw_stats_data(self, raw_data: dict = None) -> dict[list]:
         """
         returns a list of stats for each symbol. refer to tsetmc.com for information of what each item in the list is
@@ -153,10 +243,22 @@ class MarketWatch:
         
         return raw_data
     
+    def get_stats_matrix(self, raw_data: tuple[list[str], array, array, array] = None) -> WatchStatsMatrix:
+        """
+        returns stats of all symbols as a compact matrix (nested dicts are built only on demand)
+        """
+        
+        if raw_data is None:
+            raw_data = _core.get_watch_stats_matrix_data()
+        symbol_ids, values, int_values, int_mask = raw_data
+        
+        return WatchStatsMatrix(symbol_ids=symbol_ids, values=values, int_values=int_values, int_mask=int_mask)
+    
     async def aio_get_price_data(self) -> dict[str, WatchPriceDataRow]:
-        return self.get_price_data(
-            raw_data=await _core.aio_get_watch_price_data(refid=self._refid, heven=self._heven)
-        )
+        raw_data = await _core.aio_get_watch_price_data(refid=self._refid, heven=self._heven)
+        # state is changed here on the event loop, only building the models (which is pure) may run on an executor
+        price_data = self._merge_price_data(raw_data=raw_data)
+        return await aio_build_models(_build_price_data, len(price_data), price_data=price_data)
     
     async def aio_get_traders_type_data(self) -> dict[str, WatchTradersTypeDataRow]:
         return self.get_traders_type_data(
@@ -164,8 +266,12 @@ class MarketWatch:
         )
     
     async def aio_get_daily_history_data(self) -> dict[str, list[WatchDailyHistoryDataRow]]:
-        return self.get_daily_history_data(
-            raw_data=await _core.aio_get_watch_daily_history_data()
+        raw_data = await _core.aio_get_watch_daily_history_data()
+        return await aio_build_models(self.get_daily_history_data, len(raw_data), raw_data=raw_data)
+    
+    async def aio_get_daily_history_panel(self) -> WatchDailyHistoryPanel:
+        return self.get_daily_history_panel(
+            raw_data=await _core.aio_get_watch_daily_history_panel_data()
         )
     
     async def aio_get_raw_stats_data(self) -> dict[list]:
@@ -177,3 +283,8 @@ class MarketWatch:
         return self.get_stats_data(
             raw_data=await _core.aio_get_watch_stats_data()
         )
+    
+    async def aio_get_stats_matrix(self) -> WatchStatsMatrix:
+        return self.get_stats_matrix(
+            raw_data=await _core.aio_get_watch_stats_matrix_data()
+        )
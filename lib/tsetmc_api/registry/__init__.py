@@ -0,0 +1,2 @@
+from .registry import SymbolRegistry, SymbolMetadata
+from .search import SymbolSearchIndex, normalize_name
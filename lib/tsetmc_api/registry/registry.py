@@ -0,0 +1,257 @@
+import json
+import os
+from datetime import date
+from typing import Iterable, Iterator
+
+from pydantic import BaseModel
+
+from ..group import _core as _group_core
+from ..market_map import _core as _map_core
+from ..market_watch import _core as _watch_core
+from .search import SymbolSearchIndex
+from ..symbol import Symbol
+
+
+class SymbolMetadata(BaseModel):
+    symbol_id: str
+    isin: str | None = None
+    short_name: str | None = None
+    full_name: str | None = None
+    group_code: int | None = None
+    group_name: str | None = None
+    company_isin: str | None = None
+
+
+class SymbolRegistry:
+    """
+    metadata of all symbols with hash indexes by symbol_id, isin, short_name and company_isin, loaded in bulk from
+    market watch, market map and static data (company isin is only known for symbols passed to resolve_company_isins),
+    refreshes only ask market watch for symbols changed since the last refresh and the registry can be saved to disk
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path
+        self._by_id: dict[str, SymbolMetadata] = {}
+        self._by_isin: dict[str, str] = {}
+        self._by_short_name: dict[str, set[str]] = {}
+        self._by_company_isin: dict[str, set[str]] = {}
+        self._search_index = SymbolSearchIndex()
+        self._group_names: dict[int, str] = {}
+        self._watch_refid = 0
+        self._watch_heven = 0
+        self._watch_date = None
+
+        if path is not None and os.path.exists(path):
+            self.load(path=path)
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __contains__(self, symbol_id: str) -> bool:
+        return symbol_id in self._by_id
+
+    def __iter__(self) -> Iterator[SymbolMetadata]:
+        return iter(list(self._by_id.values()))
+
+    def get_by_id(self, symbol_id: str) -> SymbolMetadata | None:
+        return self._by_id.get(symbol_id)
+
+    def get_by_isin(self, isin: str) -> SymbolMetadata | None:
+        symbol_id = self._by_isin.get(isin)
+        return None if symbol_id is None else self._by_id[symbol_id]
+
+    def find_by_short_name(self, short_name: str) -> list[SymbolMetadata]:
+        """
+        returns symbols with exactly this short name (a few short names are shared by more than one symbol)
+        """
+
+        return [self._by_id[symbol_id] for symbol_id in sorted(self._by_short_name.get(short_name, ()))]
+
+    def find_by_company_isin(self, company_isin: str) -> list[SymbolMetadata]:
+        return [self._by_id[symbol_id] for symbol_id in sorted(self._by_company_isin.get(company_isin, ()))]
+
+    def search(self, query: str, limit: int = 10) -> list[SymbolMetadata]:
+        """
+        typeahead search by short name, full name or a word of full name, ignoring arabic/persian character variants,
+        zero width non joiners and spacing
+        """
+
+        return [self._by_id[symbol_id] for symbol_id in self._search_index.search(query=query, limit=limit)]
+
+    def update(self, symbol_id: str, **fields) -> bool:
+        """
+        sets the given (not None) fields of a symbol and fixes indexes, returns whether anything changed
+        """
+
+        old = self._by_id.get(symbol_id)
+        values = {} if old is None else old.dict()
+        values.update({key: value for key, value in fields.items() if value is not None})
+        values['symbol_id'] = symbol_id
+        if values.get('group_name') is None and values.get('group_code') in self._group_names:
+            values['group_name'] = self._group_names[values['group_code']]
+
+        new = SymbolMetadata(**values)
+        if new == old:
+            return False
+
+        if old is not None:
+            self._unindex(metadata=old)
+        self._by_id[symbol_id] = new
+        self._index(metadata=new)
+        return True
+
+    def refresh(self, include_market_map: bool = True) -> int:
+        """
+        loads new and changed symbols, returns number of symbols that changed
+        """
+
+        if not self._group_names:
+            self._set_group_names(raw_data=_group_core.get_group_static_data())
+
+        self._reset_watch_position()
+        watch_data = _watch_core.get_watch_price_data(refid=self._watch_refid, heven=self._watch_heven)
+        map_data = _map_core.get_market_map_data(map_type=1)[0] if include_market_map else {}
+        return self._apply_refresh(watch_data=watch_data, map_data=map_data)
+
+    async def aio_refresh(self, include_market_map: bool = True) -> int:
+        if not self._group_names:
+            self._set_group_names(raw_data=await _group_core.aio_get_group_static_data())
+
+        self._reset_watch_position()
+        watch_data = await _watch_core.aio_get_watch_price_data(refid=self._watch_refid, heven=self._watch_heven)
+        map_data = (await _map_core.aio_get_market_map_data(map_type=1))[0] if include_market_map else {}
+        return self._apply_refresh(watch_data=watch_data, map_data=map_data)
+
+    def resolve_company_isins(self, symbol_ids: Iterable[str] = None) -> int:
+        """
+        fetches id details of symbols (all symbols without a company isin by default) to fill company isin,
+        returns number of symbols that changed
+        """
+
+        changed = 0
+        for symbol_id in self._get_unresolved_ids(symbol_ids=symbol_ids):
+            changed += self._apply_id_details(symbol_id=symbol_id, details=Symbol(symbol_id=symbol_id).get_id_details())
+
+        return changed
+
+    async def aio_resolve_company_isins(self, symbol_ids: Iterable[str] = None) -> int:
+        changed = 0
+        for symbol_id in self._get_unresolved_ids(symbol_ids=symbol_ids):
+            details = await Symbol(symbol_id=symbol_id).aio_get_id_details()
+            changed += self._apply_id_details(symbol_id=symbol_id, details=details)
+
+        return changed
+
+    def save(self, path: str = None):
+        """
+        writes the registry as json (atomically replacing the old file)
+        """
+
+        path = path or self.path
+        data = {
+            'watch_refid': self._watch_refid,
+            'watch_heven': self._watch_heven,
+            'watch_date': self._watch_date,
+            'group_names': {str(code): name for code, name in self._group_names.items()},
+            'symbols': [metadata.dict() for metadata in self._by_id.values()],
+        }
+
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str = None):
+        path = path or self.path
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+
+        self._watch_refid = data['watch_refid']
+        self._watch_heven = data['watch_heven']
+        self._watch_date = data.get('watch_date')
+        self._group_names = {int(code): name for code, name in data['group_names'].items()}
+        for row in data['symbols']:
+            self.update(**row)
+
+    def _apply_refresh(self, watch_data: tuple[dict, int, int], map_data: dict) -> int:
+        changed = set()
+
+        rows, refid, heven = watch_data
+        for symbol_id, row in rows.items():
+            # delta rows of symbols that only changed their orderbook have no metadata
+            if 'symbol_id' not in row:
+                continue
+
+            if self.update(
+                    symbol_id=symbol_id,
+                    isin=row['isin'],
+                    short_name=row['short_name'],
+                    full_name=row['full_name'],
+                    group_code=row['group'],
+            ):
+                changed.add(symbol_id)
+
+        # market map names are only used for what market watch did not provide, so the sources never overwrite each
+        # other on every refresh
+        for symbol_id, row in map_data.items():
+            if self._fill_missing(
+                    symbol_id=symbol_id,
+                    short_name=row['symbol_short_name'],
+                    full_name=row['symbol_long_name'],
+                    group_name=row['group_name'],
+            ):
+                changed.add(symbol_id)
+
+        self._watch_refid = refid
+        self._watch_heven = max(self._watch_heven, heven)
+        return len(changed)
+
+    def _reset_watch_position(self):
+        # hevens restart every trading day, a position from an earlier day would skip changes made before it
+        today = date.today().isoformat()
+        if self._watch_date != today:
+            self._watch_refid = 0
+            self._watch_heven = 0
+            self._watch_date = today
+
+    def _fill_missing(self, symbol_id: str, **fields) -> bool:
+        old = self._by_id.get(symbol_id)
+        if old is not None:
+            fields = {key: value for key, value in fields.items() if getattr(old, key) is None}
+        return self.update(symbol_id=symbol_id, **fields)
+
+    def _apply_id_details(self, symbol_id: str, details) -> bool:
+        return self.update(
+            symbol_id=symbol_id,
+            isin=details.isin,
+            company_isin=details.company_isin,
+            group_name=details.group_name,
+        )
+
+    def _get_unresolved_ids(self, symbol_ids: Iterable[str] | None) -> list[str]:
+        if symbol_ids is None:
+            return [symbol_id for symbol_id, metadata in self._by_id.items() if metadata.company_isin is None]
+        return list(symbol_ids)
+
+    def _set_group_names(self, raw_data: list[dict]):
+        # static data also has paper type rows, their codes overlap with industry group codes
+        self._group_names = {int(row['code']): row['name'] for row in raw_data if row['type'] != 'PaperType'}
+
+    def _index(self, metadata: SymbolMetadata):
+        if metadata.isin is not None:
+            self._by_isin[metadata.isin] = metadata.symbol_id
+        if metadata.short_name is not None:
+            self._by_short_name.setdefault(metadata.short_name, set()).add(metadata.symbol_id)
+        if metadata.company_isin is not None:
+            self._by_company_isin.setdefault(metadata.company_isin, set()).add(metadata.symbol_id)
+        self._search_index.add(symbol_id=metadata.symbol_id, short_name=metadata.short_name, full_name=metadata.full_name)
+
+    def _unindex(self, metadata: SymbolMetadata):
+        self._search_index.remove(symbol_id=metadata.symbol_id)
+        if metadata.isin is not None and self._by_isin.get(metadata.isin) == metadata.symbol_id:
+            del self._by_isin[metadata.isin]
+        for index, key in ((self._by_short_name, metadata.short_name), (self._by_company_isin, metadata.company_isin)):
+            if key is not None and key in index:
+                index[key].discard(metadata.symbol_id)
+                if not index[key]:
+                    del index[key]
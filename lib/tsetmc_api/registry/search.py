@@ -0,0 +1,131 @@
+import heapq
+import re
+from bisect import bisect_left, insort
+
+_CHARACTERS_MAP = str.maketrans({
+    'ي': 'ی',
+    'ى': 'ی',
+    'ئ': 'ی',
+    'ك': 'ک',
+    'ة': 'ه',
+    'ۀ': 'ه',
+    'أ': 'ا',
+    'إ': 'ا',
+    'آ': 'ا',
+    'ؤ': 'و',
+    # zero width non joiner and joiner are treated like spaces
+    '‌': ' ',
+    '‍': ' ',
+    **{chr(0x06f0 + i): str(i) for i in range(10)},
+    **{chr(0x0660 + i): str(i) for i in range(10)},
+})
+
+# arabic diacritics (harakat, tanvin, shadda, ...) and tatweel
+_REMOVED_CHARACTERS = re.compile('[ً-ٰٟـ]')
+_PUNCTUATION = re.compile(r'[^\w\s]')
+_SPACES = re.compile(r'\s+')
+
+# key kinds, lower kinds are ranked first in search results
+_SHORT_NAME = 0
+_FULL_NAME = 1
+_FULL_NAME_WORD = 2
+
+# short prefixes match most keys, their best results are kept until a key starting with them is added or removed
+_CACHED_PREFIX_LENGTH = 2
+_CACHED_RESULTS_COUNT = 100
+
+
+def normalize_name(name: str) -> str:
+    """
+    unifies arabic/persian variants of characters and digits, drops diacritics and turns punctuation, zero width non
+    joiners and runs of whitespace into single spaces
+    """
+
+    name = _PUNCTUATION.sub(' ', _REMOVED_CHARACTERS.sub('', name.translate(_CHARACTERS_MAP)))
+    return _SPACES.sub(' ', name).strip().lower()
+
+
+def _compact(name: str) -> str:
+    # spacing is typed inconsistently (e.g. "فولاد مبارکه" and "فولادمبارکه"), keys ignore it completely
+    return normalize_name(name).replace(' ', '')
+
+
+class SymbolSearchIndex:
+    """
+    prefix search over normalized short names, full names and words of full names of symbols (a sorted list of keys
+    searched with bisect), symbols can be added, changed and removed one by one, the top results of short prefixes
+    are cached
+    """
+
+    def __init__(self):
+        # sorted (key, kind, symbol_id)
+        self._keys: list[tuple[str, int, str]] = []
+        self._symbol_keys: dict[str, list[tuple[str, int, str]]] = {}
+        self._prefix_results: dict[str, list[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._symbol_keys)
+
+    def add(self, symbol_id: str, short_name: str = None, full_name: str = None):
+        """
+        adds a symbol or replaces its names
+        """
+
+        self.remove(symbol_id=symbol_id)
+
+        keys = set()
+        if short_name:
+            keys.add((_compact(short_name), _SHORT_NAME, symbol_id))
+        if full_name:
+            words = normalize_name(full_name).split(' ')
+            keys.add((''.join(words), _FULL_NAME, symbol_id))
+            for i in range(1, len(words)):
+                keys.add((''.join(words[i:]), _FULL_NAME_WORD, symbol_id))
+
+        keys = sorted(key for key in keys if key[0])
+        for key in keys:
+            insort(self._keys, key)
+            self._forget_prefix_results(key=key[0])
+        self._symbol_keys[symbol_id] = keys
+
+    def remove(self, symbol_id: str):
+        for key in self._symbol_keys.pop(symbol_id, ()):
+            index = bisect_left(self._keys, key)
+            del self._keys[index]
+            self._forget_prefix_results(key=key[0])
+
+    def _forget_prefix_results(self, key: str):
+        for length in range(1, _CACHED_PREFIX_LENGTH + 1):
+            self._prefix_results.pop(key[:length], None)
+
+    def search(self, query: str, limit: int = 10) -> list[str]:
+        """
+        returns ids of symbols with a name (or a word of their full name) starting with query, exact short name
+        matches come first, then short name, full name and word matches, shorter names first
+        """
+
+        prefix = _compact(query)
+        if not prefix:
+            return []
+
+        if len(prefix) > _CACHED_PREFIX_LENGTH or limit > _CACHED_RESULTS_COUNT:
+            return self._search(prefix=prefix, limit=limit)
+
+        results = self._prefix_results.get(prefix)
+        if results is None:
+            results = self._prefix_results[prefix] = self._search(prefix=prefix, limit=_CACHED_RESULTS_COUNT)
+
+        return results[:limit]
+
+    def _search(self, prefix: str, limit: int) -> list[str]:
+        best = {}
+        index = bisect_left(self._keys, (prefix,))
+        while index < len(self._keys) and self._keys[index][0].startswith(prefix):
+            key, kind, symbol_id = self._keys[index]
+            rank = (key != prefix, kind, len(key))
+            if symbol_id not in best or rank < best[symbol_id]:
+                best[symbol_id] = rank
+            index += 1
+
+        # only the best `limit` symbols are ordered, not all of the matches
+        return heapq.nsmallest(limit, best, key=lambda symbol_id: (best[symbol_id], symbol_id))
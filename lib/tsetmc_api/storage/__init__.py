@@ -0,0 +1,2 @@
+from .parquet import ParquetStore, ParquetDataKind
+from .ticks import TickStore
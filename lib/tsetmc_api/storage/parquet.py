@@ -0,0 +1,233 @@
+import os
+from collections import defaultdict
+from enum import Enum
+from typing import Iterable
+
+from jdatetime import date as jdate
+
+from ..day_details.orderbook import DayDetailsOrderBookDataRow
+from ..day_details.price import DayDetailsPriceDataRow
+from ..day_details.trade import DayDetailsTradeDataRow
+from ..symbol.price import SymbolDailyPriceDataRow
+
+
+class ParquetDataKind(Enum):
+    TRADES = 'trades'
+    PRICES = 'prices'
+    ORDERBOOK = 'orderbook'
+    DAILY_HISTORY = 'daily_history'
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.parquet
+    except ImportError as ex:
+        raise ImportError('parquet storage needs pyarrow, install it with "pip install tsetmc-api[parquet]"') from ex
+
+    return pyarrow
+
+
+def _convert_jdate_to_int(date: jdate) -> int:
+    return date.year * 10000 + date.month * 100 + date.day
+
+
+def _get_schema(pa, kind: ParquetDataKind):
+    # date columns are jalali dates as yyyymmdd integers
+    if kind == ParquetDataKind.TRADES:
+        fields = [
+            ('date', pa.int32()),
+            ('time', pa.time32('s')),
+            ('price', pa.int64()),
+            ('volume', pa.int64()),
+        ]
+    elif kind == ParquetDataKind.PRICES:
+        fields = [
+            ('date', pa.int32()),
+            ('time', pa.time32('s')),
+            ('close', pa.int64()),
+            ('last', pa.int64()),
+            ('value', pa.int64()),
+            ('volume', pa.int64()),
+            ('count', pa.int64()),
+        ]
+    elif kind == ParquetDataKind.ORDERBOOK:
+        # one row per level of each orderbook, snapshot_time is the time of the orderbook and time is the time of the level
+        fields = [
+            ('date', pa.int32()),
+            ('snapshot_time', pa.time32('s')),
+            ('side', pa.dictionary(pa.int8(), pa.string())),
+            ('rank', pa.int16()),
+            ('time', pa.time32('s')),
+            ('count', pa.int64()),
+            ('price', pa.int64()),
+            ('volume', pa.int64()),
+        ]
+    else:
+        fields = [
+            ('date', pa.int32()),
+            ('last', pa.int64()),
+            ('close', pa.int64()),
+            ('open', pa.int64()),
+            ('yesterday', pa.int64()),
+            ('high', pa.int64()),
+            ('low', pa.int64()),
+            ('count', pa.int64()),
+            ('volume', pa.int64()),
+            ('value', pa.int64()),
+        ]
+
+    return pa.schema(fields)
+
+
+class ParquetStore:
+    """
+    compressed parquet files of day details and daily histories partitioned by symbol and (jalali) month, laid out as
+    root/<kind>/symbol_id=<symbol_id>/month=<yyyymm>/<file>.parquet so readers only open the partitions they need
+    (pyarrow should be installed)
+    """
+
+    def __init__(self, root: str, compression: str = 'zstd'):
+        self.root = root
+        self.compression = compression
+
+    def write_trades_data(self, symbol_id: str, date: jdate, rows: list[DayDetailsTradeDataRow]):
+        columns = {
+            'time': [row.time for row in rows],
+            'price': [row.price for row in rows],
+            'volume': [row.volume for row in rows],
+        }
+        self._write_day(kind=ParquetDataKind.TRADES, symbol_id=symbol_id, date=date, columns=columns)
+
+    def write_price_data(self, symbol_id: str, date: jdate, rows: list[DayDetailsPriceDataRow]):
+        columns = {
+            'time': [row.time for row in rows],
+            'close': [row.close for row in rows],
+            'last': [row.last for row in rows],
+            'value': [row.value for row in rows],
+            'volume': [row.volume for row in rows],
+            'count': [row.count for row in rows],
+        }
+        self._write_day(kind=ParquetDataKind.PRICES, symbol_id=symbol_id, date=date, columns=columns)
+
+    def write_orderbook_data(self, symbol_id: str, date: jdate, rows: list[DayDetailsOrderBookDataRow]):
+        columns = defaultdict(list)
+        for orderbook in rows:
+            for side, levels in (('buy', orderbook.buy_rows), ('sell', orderbook.sell_rows)):
+                for rank, level in enumerate(levels, start=1):
+                    columns['snapshot_time'].append(orderbook.time)
+                    columns['side'].append(side)
+                    columns['rank'].append(rank)
+                    columns['time'].append(level.time)
+                    columns['count'].append(level.count)
+                    columns['price'].append(level.price)
+                    columns['volume'].append(level.volume)
+        self._write_day(kind=ParquetDataKind.ORDERBOOK, symbol_id=symbol_id, date=date, columns=columns)
+
+    def write_daily_history(self, symbol_id: str, rows: list[SymbolDailyPriceDataRow]):
+        """
+        writes daily history of a symbol, months present in rows are replaced as a whole
+        """
+
+        months = defaultdict(list)
+        for row in rows:
+            months[row.date.year * 100 + row.date.month].append(row)
+
+        for month, month_rows in months.items():
+            month_rows.sort(key=lambda row: _convert_jdate_to_int(date=row.date))
+            columns = {
+                'date': [_convert_jdate_to_int(date=row.date) for row in month_rows],
+                'last': [row.last for row in month_rows],
+                'close': [row.close for row in month_rows],
+                'open': [row.open for row in month_rows],
+                'yesterday': [row.yesterday for row in month_rows],
+                'high': [row.high for row in month_rows],
+                'low': [row.low for row in month_rows],
+                'count': [row.count for row in month_rows],
+                'volume': [row.volume for row in month_rows],
+                'value': [row.value for row in month_rows],
+            }
+            self._write_file(
+                kind=ParquetDataKind.DAILY_HISTORY,
+                symbol_id=symbol_id,
+                month=month,
+                name='history',
+                columns=columns,
+            )
+
+    def read(
+            self,
+            kind: ParquetDataKind,
+            symbol_ids: Iterable[str] = None,
+            start_date: jdate = None,
+            end_date: jdate = None,
+            columns: list[str] = None,
+    ):
+        """
+        reads stored data as a pyarrow table (with symbol_id and month columns added from partitions), symbol and date
+        filters prune whole partitions first and then row groups using parquet statistics
+        """
+
+        pa = _import_pyarrow()
+        path = os.path.join(self.root, kind.value)
+        if not os.path.isdir(path):
+            return self._get_dataset_schema(pa=pa, kind=kind).empty_table()
+
+        dataset = pa.dataset.dataset(
+            path,
+            schema=self._get_dataset_schema(pa=pa, kind=kind),
+            format='parquet',
+            partitioning='hive',
+        )
+
+        field = pa.dataset.field
+        conditions = []
+        if symbol_ids is not None:
+            conditions.append(field('symbol_id').isin(list(symbol_ids)))
+        if start_date is not None:
+            conditions.append(field('month') >= start_date.year * 100 + start_date.month)
+            conditions.append(field('date') >= _convert_jdate_to_int(date=start_date))
+        if end_date is not None:
+            conditions.append(field('month') <= end_date.year * 100 + end_date.month)
+            conditions.append(field('date') <= _convert_jdate_to_int(date=end_date))
+
+        expression = None
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+
+        return dataset.to_table(columns=columns, filter=expression)
+
+    def _write_day(self, kind: ParquetDataKind, symbol_id: str, date: jdate, columns: dict[str, list]):
+        deven = _convert_jdate_to_int(date=date)
+        columns = {'date': [deven] * len(next(iter(columns.values()), [])), **columns}
+        self._write_file(
+            kind=kind,
+            symbol_id=symbol_id,
+            month=date.year * 100 + date.month,
+            name=str(deven),
+            columns=columns,
+        )
+
+    def _write_file(self, kind: ParquetDataKind, symbol_id: str, month: int, name: str, columns: dict[str, list]):
+        pa = _import_pyarrow()
+        schema = _get_schema(pa=pa, kind=kind)
+        table = pa.table({
+            f.name: pa.array(columns.get(f.name, []), type=f.type)
+            for f in schema
+        }, schema=schema)
+
+        directory = os.path.join(self.root, kind.value, f'symbol_id={symbol_id}', f'month={month}')
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'{name}.parquet')
+
+        # written to a hidden temporary file first (datasets skip files starting with a dot) so readers never see a
+        # half written file
+        tmp_path = os.path.join(directory, f'.{name}.parquet.tmp')
+        pa.parquet.write_table(table, tmp_path, compression=self.compression)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _get_dataset_schema(pa, kind: ParquetDataKind):
+        schema = _get_schema(pa=pa, kind=kind)
+        return schema.append(pa.field('symbol_id', pa.string())).append(pa.field('month', pa.int32()))
@@ -0,0 +1,156 @@
+import json
+import mmap
+import os
+import struct
+from typing import Iterator
+
+from jdatetime import date as jdate
+
+from ..day_details.trade import DayDetailsTradeDataRow
+from ..utils import import_numpy, convert_jtime_to_heven, convert_heven_to_jtime, convert_jdate_to_deven, convert_deven_to_jdate
+
+# heven, price, volume (little endian, packed)
+TICK_RECORD = struct.Struct('<iqq')
+
+
+class TickStore:
+    """
+    append only binary store of trades, records are fixed width (heven, price, volume) and a (symbol_id, date) index
+    points at the records of each day, reads are served from a memory map without building python objects per trade
+    (writing a day again appends it and points the index at the new records)
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._data_path = os.path.join(root, 'ticks.bin')
+        self._index_path = os.path.join(root, 'index.jsonl')
+
+        # (symbol_id, deven) -> (first record, records count)
+        self._index = {}
+        self._symbol_devens = {}
+        self._mmap = None
+        self._mmap_size = 0
+
+        records_count = self._truncate_partial_record()
+        if os.path.exists(self._index_path):
+            with open(self._index_path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # last line of an interrupted write may be cut in half
+                        continue
+                    if entry['start'] + entry['count'] > records_count:
+                        # records of this entry were lost (the data file was cut after it was written)
+                        continue
+                    self._add_index_entry(**entry)
+
+    def __contains__(self, key: tuple[str, jdate]) -> bool:
+        symbol_id, date = key
+        return (symbol_id, convert_jdate_to_deven(date=date)) in self._index
+
+    def get_symbol_ids(self) -> list[str]:
+        return sorted(self._symbol_devens)
+
+    def get_dates(self, symbol_id: str) -> list[jdate]:
+        return [convert_deven_to_jdate(deven=deven) for deven in sorted(self._symbol_devens.get(symbol_id, ()))]
+
+    def append_trades(self, symbol_id: str, date: jdate, rows: list[DayDetailsTradeDataRow]):
+        """
+        appends trades of a symbol in a day, records are flushed to disk before the index entry is written
+        """
+
+        data = bytearray(TICK_RECORD.size * len(rows))
+        for i, row in enumerate(rows):
+            TICK_RECORD.pack_into(data, i * TICK_RECORD.size, convert_jtime_to_heven(t=row.time), row.price, row.volume)
+
+        start = self._truncate_partial_record()
+        with open(self._data_path, 'ab') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+        entry = {'symbol_id': symbol_id, 'deven': convert_jdate_to_deven(date=date), 'start': start, 'count': len(rows)}
+        with open(self._index_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + '\n')
+        self._add_index_entry(**entry)
+
+    def get_buffer(self, symbol_id: str, date: jdate) -> memoryview:
+        """
+        returns raw records of a symbol in a day (a view over the memory map, not a copy)
+        """
+
+        start, count = self._index[(symbol_id, convert_jdate_to_deven(date=date))]
+        return self._get_mmap_view()[start * TICK_RECORD.size:(start + count) * TICK_RECORD.size]
+
+    def iter_ticks(self, symbol_id: str, date: jdate) -> Iterator[tuple[int, int, int]]:
+        """
+        yields (heven, price, volume) of each trade of a symbol in a day
+        """
+
+        return TICK_RECORD.iter_unpack(self.get_buffer(symbol_id=symbol_id, date=date))
+
+    def get_trades_data(self, symbol_id: str, date: jdate) -> list[DayDetailsTradeDataRow]:
+        return [DayDetailsTradeDataRow(
+            time=convert_heven_to_jtime(heven=heven),
+            price=price,
+            volume=volume,
+        ) for heven, price, volume in self.iter_ticks(symbol_id=symbol_id, date=date)]
+
+    def get_array(self, symbol_id: str, date: jdate):
+        """
+        returns trades of a symbol in a day as a numpy structured array (heven, price, volume) sharing memory with the
+        memory map (numpy should be installed)
+        """
+
+        numpy = import_numpy()
+
+        return numpy.frombuffer(self.get_buffer(symbol_id=symbol_id, date=date), dtype=self.get_numpy_dtype())
+
+    def iter_arrays(self, symbol_id: str, start_date: jdate = None, end_date: jdate = None) -> Iterator[tuple[jdate, object]]:
+        """
+        yields (date, numpy array) for stored days of a symbol between start_date and end_date (both inclusive)
+        """
+
+        start = 0 if start_date is None else convert_jdate_to_deven(date=start_date)
+        end = 99999999 if end_date is None else convert_jdate_to_deven(date=end_date)
+        for deven in sorted(self._symbol_devens.get(symbol_id, ())):
+            if start <= deven <= end:
+                date = convert_deven_to_jdate(deven=deven)
+                yield date, self.get_array(symbol_id=symbol_id, date=date)
+
+    @staticmethod
+    def get_numpy_dtype():
+        numpy = import_numpy()
+
+        return numpy.dtype([('heven', '<i4'), ('price', '<i8'), ('volume', '<i8')])
+
+    def _add_index_entry(self, symbol_id: str, deven: int, start: int, count: int):
+        self._index[(symbol_id, deven)] = (start, count)
+        self._symbol_devens.setdefault(symbol_id, set()).add(deven)
+
+    def _truncate_partial_record(self) -> int:
+        # an interrupted append may leave a partial record at the end, later records would be misaligned after it
+        if not os.path.exists(self._data_path):
+            return 0
+
+        size = os.path.getsize(self._data_path)
+        if size % TICK_RECORD.size:
+            size -= size % TICK_RECORD.size
+            os.truncate(self._data_path, size)
+
+        return size // TICK_RECORD.size
+
+    def _get_mmap_view(self) -> memoryview:
+        size = os.path.getsize(self._data_path) if os.path.exists(self._data_path) else 0
+        if size == 0:
+            return memoryview(b'')
+
+        if self._mmap is None or size != self._mmap_size:
+            # the old map is left to the garbage collector since views handed out earlier may still use it
+            with open(self._data_path, 'rb') as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._mmap_size = size
+
+        return memoryview(self._mmap)
@@ -1,10 +1,11 @@
 import ast
 import locale
+from typing import Iterable
 
 from bs4 import BeautifulSoup
-from jdatetime import time as jtime, date as jdate, datetime as jdatetime
+from jdatetime import time as jtime, datetime as jdatetime
 
-from ..utils import convert_deven_to_jdate, safe_request, aio_safe_request
+from ..utils import convert_deven_to_jdate, safe_request, aio_safe_request, aio_run_parser
 
 
 def get_symbol_intraday_price_chart(symbol_id: str, response: str = None) -> list[dict]:
@@ -35,7 +36,25 @@ def get_symbol_intraday_price_chart(symbol_id: str, response: str = None) -> lis
     return result
 
 
-def get_symbol_price_overview(symbol_id: str, response: str = None) -> dict:
+PRICE_OVERVIEW_SECTIONS = ('price_data', 'orderbook_data', 'traders_type_data', 'group_data')
+
+
+def _get_price_overview_sections(sections: Iterable[str] | str | None) -> tuple[str, ...]:
+    if sections is None:
+        return PRICE_OVERVIEW_SECTIONS
+
+    # a single section name would otherwise be iterated character by character
+    sections = (sections,) if isinstance(sections, str) else tuple(sections)
+    unknown_sections = set(sections) - set(PRICE_OVERVIEW_SECTIONS)
+    if unknown_sections:
+        raise ValueError(f'unknown price overview sections: {", ".join(sorted(unknown_sections))}')
+
+    return sections
+
+
+def get_symbol_price_overview(symbol_id: str, response: str = None, sections: Iterable[str] = None) -> dict:
+    sections = _get_price_overview_sections(sections=sections)
+
     if response is None:
         response = safe_request(
             method='GET',
@@ -49,8 +68,9 @@ def get_symbol_price_overview(symbol_id: str, response: str = None) -> dict:
         response = response.text
     
     all_sections = response.split(';')
+    result = {}
 
-    # price section
+    # price section (traders type values are calculated from close price)
     data = all_sections[0].split(',')
     price_data = {
         'last': int(data[2]),
@@ -63,84 +83,85 @@ def get_symbol_price_overview(symbol_id: str, response: str = None) -> dict:
         'volume': int(data[9]),
         'value': int(data[10]),
     }
+    if 'price_data' in sections:
+        result['price_data'] = price_data
 
     # orderbook section
-    data = all_sections[2].split(',')
-    buy_book = []
-    sell_book = []
-    for row in data:
-        if not row:
-            continue
-
-        sell_count, sell_volume, sell_price, buy_price, buy_volume, buy_count = row.split('@')
-        buy_book.append({
-            'count': int(buy_count),
-            'price': int(buy_price),
-            'volume': int(buy_volume),
-        })
-        sell_book.append({
-            'count': int(sell_count),
-            'price': int(sell_price),
-            'volume': int(sell_volume),
-        })
-    orderbook = {
-        'buy_rows': buy_book,
-        'sell_rows': sell_book,
-    }
+    if 'orderbook_data' in sections:
+        data = all_sections[2].split(',')
+        buy_book = []
+        sell_book = []
+        for row in data:
+            if not row:
+                continue
+
+            sell_count, sell_volume, sell_price, buy_price, buy_volume, buy_count = row.split('@')
+            buy_book.append({
+                'count': int(buy_count),
+                'price': int(buy_price),
+                'volume': int(buy_volume),
+            })
+            sell_book.append({
+                'count': int(sell_count),
+                'price': int(sell_price),
+                'volume': int(sell_volume),
+            })
+        result['orderbook_data'] = {
+            'buy_rows': buy_book,
+            'sell_rows': sell_book,
+        }
 
     # traders_type section
-    data = all_sections[4].split(',')
-    r_buy_v, l_buy_v, _, r_sell_v, l_sell_v, r_buy_c, l_buy_c, _, r_sell_c, l_sell_c = data
-    traders_type = {
-        'legal': {
-            'buy': {
-                'value': int(l_buy_v) * price_data['close'],
-                'volume': int(l_buy_v),
-                'count': int(l_buy_c),
+    if 'traders_type_data' in sections:
+        data = all_sections[4].split(',')
+        r_buy_v, l_buy_v, _, r_sell_v, l_sell_v, r_buy_c, l_buy_c, _, r_sell_c, l_sell_c = data
+        result['traders_type_data'] = {
+            'legal': {
+                'buy': {
+                    'value': int(l_buy_v) * price_data['close'],
+                    'volume': int(l_buy_v),
+                    'count': int(l_buy_c),
+                },
+                'sell': {
+                    'value': int(l_sell_v) * price_data['close'],
+                    'volume': int(l_sell_v),
+                    'count': int(l_sell_c),
+                }
             },
-            'sell': {
-                'value': int(l_sell_v) * price_data['close'],
-                'volume': int(l_sell_v),
-                'count': int(l_sell_c),
-            }
-        },
-        'real': {
-            'buy': {
-                'value': int(r_buy_v) * price_data['close'],
-                'volume': int(r_buy_v),
-                'count': int(r_buy_c),
+            'real': {
+                'buy': {
+                    'value': int(r_buy_v) * price_data['close'],
+                    'volume': int(r_buy_v),
+                    'count': int(r_buy_c),
+                },
+                'sell': {
+                    'value': int(r_sell_v) * price_data['close'],
+                    'volume': int(r_sell_v),
+                    'count': int(r_sell_c),
+                }
             },
-            'sell': {
-                'value': int(r_sell_v) * price_data['close'],
-                'volume': int(r_sell_v),
-                'count': int(r_sell_c),
-            }
-        },
-    }
+        }
 
     # group_live_data section
-    data = all_sections[5].split(',')
-    group_data = []
-    for row in data:
-        if not row:
-            continue
-
-        s_id, last, close, _, count, volume, value = row.split('@')
-        group_data.append({
-            'symbol_id': s_id,
-            'last': int(last),
-            'close': int(close),
-            'count': int(count),
-            'volume': int(volume),
-            'value': int(value),
-        })
+    if 'group_data' in sections:
+        data = all_sections[5].split(',')
+        group_data = []
+        for row in data:
+            if not row:
+                continue
+
+            s_id, last, close, _, count, volume, value = row.split('@')
+            group_data.append({
+                'symbol_id': s_id,
+                'last': int(last),
+                'close': int(close),
+                'count': int(count),
+                'volume': int(volume),
+                'value': int(value),
+            })
+        result['group_data'] = group_data
 
-    return {
-        'price_data': price_data,
-        'orderbook_data': orderbook,
-        'traders_type_data': traders_type,
-        'group_data': group_data,
-    }
+    return result
 
 
 def get_symbol_supervisor_messages(symbol_id: str, response: str = None) -> list[dict]:
@@ -200,11 +221,7 @@ def get_symbol_daily_ticks_history(symbol_id: str, response: str = None) -> list
 
         dt, high, low, close, last, opn, yesterday, value, volume, count = row.split('@')
         ticks.append({
-            'date': jdate.fromgregorian(
-                year=int(dt[:4]),
-                month=int(dt[4:6]),
-                day=int(dt[6:]),
-            ),
+            'date': convert_deven_to_jdate(deven=int(dt)),
             'high': int(float(high)),
             'low': int(float(low)),
             'close': int(float(close)),
@@ -338,11 +355,7 @@ def get_symbol_traders_type_history(symbol_id: str, response: str = None) -> lis
         except ValueError:
             continue
         traders_type_history.append({
-            'date': jdate.fromgregorian(
-                year=int(dt[:4]),
-                month=int(dt[4:6]),
-                day=int(dt[6:]),
-            ),
+            'date': convert_deven_to_jdate(deven=int(dt)),
             'legal': {
                 'buy': {
                     'value': l_buy_vl,
@@ -455,10 +468,11 @@ async def aio_get_symbol_intraday_price_chart(symbol_id: str) -> list[dict]:
         verify=False
     )
     response = response.text
-    return get_symbol_intraday_price_chart(symbol_id=symbol_id, response=response)
+    return await aio_run_parser(get_symbol_intraday_price_chart, len(response), symbol_id=symbol_id, response=response)
 
 
-async def aio_get_symbol_price_overview(symbol_id: str) -> dict:
+async def aio_get_symbol_price_overview(symbol_id: str, sections: Iterable[str] = None) -> dict:
+    sections = _get_price_overview_sections(sections=sections)
     response = await aio_safe_request(
         method='GET',
         url='http://old.tsetmc.com/tsev2/data/instinfodata.aspx',
@@ -469,7 +483,7 @@ async def aio_get_symbol_price_overview(symbol_id: str) -> dict:
         verify=False
     )
     response = response.text
-    return get_symbol_price_overview(symbol_id=symbol_id, response=response)
+    return await aio_run_parser(get_symbol_price_overview, len(response), symbol_id=symbol_id, response=response, sections=sections)
 
 
 async def aio_get_symbol_supervisor_messages(symbol_id: str) -> list[dict]:
@@ -483,7 +497,7 @@ async def aio_get_symbol_supervisor_messages(symbol_id: str) -> list[dict]:
         verify=False
     )
     response = response.text
-    return get_symbol_supervisor_messages(symbol_id=symbol_id, response=response)
+    return await aio_run_parser(get_symbol_supervisor_messages, len(response), symbol_id=symbol_id, response=response)
 
 
 async def aio_get_symbol_daily_ticks_history(symbol_id: str) -> list[dict]:
@@ -498,7 +512,7 @@ async def aio_get_symbol_daily_ticks_history(symbol_id: str) -> list[dict]:
         verify=False
     )
     response = response.text
-    return get_symbol_daily_ticks_history(symbol_id=symbol_id, response=response)
+    return await aio_run_parser(get_symbol_daily_ticks_history, len(response), symbol_id=symbol_id, response=response)
 
 
 async def aio_get_symbol_notifications(symbol_id: str) -> list[dict]:
@@ -511,7 +525,7 @@ async def aio_get_symbol_notifications(symbol_id: str) -> list[dict]:
         verify=False
     )
     response = response.text
-    return get_symbol_notifications(symbol_id=symbol_id, response=response)
+    return await aio_run_parser(get_symbol_notifications, len(response), symbol_id=symbol_id, response=response)
 
 
 async def aio_get_symbol_state_changes(symbol_id: str) -> list[dict]:
@@ -525,7 +539,7 @@ async def aio_get_symbol_state_changes(symbol_id: str) -> list[dict]:
         verify=False
     )
     response = response.text
-    return get_symbol_state_changes(symbol_id=symbol_id, response=response)
+    return await aio_run_parser(get_symbol_state_changes, len(response), symbol_id=symbol_id, response=response)
 
 
 async def aio_get_symbol_id_details(symbol_id: str) -> dict:
@@ -539,7 +553,7 @@ async def aio_get_symbol_id_details(symbol_id: str) -> dict:
         verify=False
     )
     response = response.text
-    return get_symbol_id_details(symbol_id=symbol_id, response=response)
+    return await aio_run_parser(get_symbol_id_details, len(response), symbol_id=symbol_id, response=response)
 
 
 async def aio_get_symbol_traders_type_history(symbol_id: str) -> list[dict]:
@@ -552,7 +566,7 @@ async def aio_get_symbol_traders_type_history(symbol_id: str) -> list[dict]:
         verify=False
     )
     response = response.text
-    return get_symbol_traders_type_history(symbol_id=symbol_id, response=response)
+    return await aio_run_parser(get_symbol_traders_type_history, len(response), symbol_id=symbol_id, response=response)
 
 
 async def aio_get_symbol_shareholders(company_isin: str) -> list[dict]:
@@ -566,7 +580,7 @@ async def aio_get_symbol_shareholders(company_isin: str) -> list[dict]:
         verify=False
     )
     response = response.text
-    return get_symbol_shareholders(company_isin=company_isin, response=response)
+    return await aio_run_parser(get_symbol_shareholders, len(response), company_isin=company_isin, response=response)
 
 
 async def aio_get_symbol_shareholder_details(shareholder_id: str, company_isin: str) -> dict:
@@ -579,4 +593,4 @@ async def aio_get_symbol_shareholder_details(shareholder_id: str, company_isin:
         verify=False
     )
     response = response.text
-    return get_symbol_shareholder_details(shareholder_id=shareholder_id, company_isin=company_isin, response=response)
+    return await aio_run_parser(get_symbol_shareholder_details, len(response), shareholder_id=shareholder_id, company_isin=company_isin, response=response)
@@ -27,10 +27,11 @@ class SymbolDailyPriceDataRow(SymbolPriceData):
 
 
 class SymbolPriceOverview(BaseModel):
-    price_data: SymbolPriceData
-    orderbook: SymbolOrderBookData
-    traders_type: SymbolTradersTypeDataRow
-    group_data: list[SymbolGroupDataRow]
+    # sections that were not requested are None
+    price_data: SymbolPriceData | None = None
+    orderbook: SymbolOrderBookData | None = None
+    traders_type: SymbolTradersTypeDataRow | None = None
+    group_data: list[SymbolGroupDataRow] | None = None
 
 
 class SymbolIntraDayPriceChartDataRow(BaseModel):
@@ -0,0 +1,41 @@
+from pydantic import BaseModel
+
+from .identification import SymbolIdDetails
+from .notification import SymbolNotificationsDataRow
+from .price import SymbolPriceOverview, SymbolIntraDayPriceChartDataRow, SymbolDailyPriceDataRow
+from .shareholder import SymbolShareHolderDataRow
+from .state_change import SymbolStateChangeDataRow
+from .supervisor_message import SymbolSupervisorMessageDataRow
+from .traders_type import SymbolTradersTypeDataRow
+
+PROFILE_SECTIONS = (
+    'price_overview',
+    'intraday_price_chart_data',
+    'daily_history',
+    'traders_type_history',
+    'id_details',
+    'notifications_data',
+    'state_changes_data',
+    'supervisor_messages_data',
+    'shareholders_data',
+)
+
+
+class SymbolProfile(BaseModel):
+    symbol_id: str
+    # sections that were not requested or failed are None, errors holds the exception of each failed section
+    price_overview: SymbolPriceOverview | None = None
+    intraday_price_chart_data: list[SymbolIntraDayPriceChartDataRow] | None = None
+    daily_history: list[SymbolDailyPriceDataRow] | None = None
+    traders_type_history: list[SymbolTradersTypeDataRow] | None = None
+    id_details: SymbolIdDetails | None = None
+    notifications_data: list[SymbolNotificationsDataRow] | None = None
+    state_changes_data: list[SymbolStateChangeDataRow] | None = None
+    supervisor_messages_data: list[SymbolSupervisorMessageDataRow] | None = None
+    shareholders_data: list[SymbolShareHolderDataRow] | None = None
+    errors: dict[str, Exception] = {}
+
+    class Config:
+        arbitrary_types_allowed = True
+        # rows are already validated models, copying thousands of them again is wasted work
+        copy_on_model_validation = 'none'
@@ -1,10 +1,13 @@
-from typing import Any
+from typing import Any, TYPE_CHECKING
 
 from jdatetime import date as jdate
 from pydantic import BaseModel, PrivateAttr
 
 from . import _core
 
+if TYPE_CHECKING:
+    from .symbol import Symbol
+
 
 class SymbolShareHolderPortfolioRow(BaseModel):
     symbol_id: str
@@ -14,13 +17,14 @@ class SymbolShareHolderPortfolioRow(BaseModel):
 
 
 class SymbolShareHolder(BaseModel):
-    _company_isin: str = PrivateAttr()
+    # the shared Symbol instance, company isin is read from its id details instead of being copied
+    _symbol: 'Symbol' = PrivateAttr()
     id: str
     name: str
 
-    def __init__(self, _company_isin: str, **data: Any):
+    def __init__(self, _symbol: 'Symbol', **data: Any):
         super().__init__(**data)
-        self._company_isin = _company_isin
+        self._symbol = _symbol
 
     def get_portfolio_data(self, raw_data: dict = None) -> list[SymbolShareHolderPortfolioRow]:
         """
@@ -29,7 +33,7 @@ class SymbolShareHolder(BaseModel):
         if raw_data is None:
             raw_data = _core.get_symbol_shareholder_details(
                 shareholder_id=self.id,
-                company_isin=self._company_isin,
+                company_isin=self._symbol.get_company_isin(),
             )
         raw_data = raw_data['portfolio']
         
@@ -44,7 +48,7 @@ class SymbolShareHolder(BaseModel):
         return self.get_portfolio_data(
             raw_data=await _core.aio_get_symbol_shareholder_details(
                 shareholder_id=self.id,
-                company_isin=self._company_isin,
+                company_isin=await self._symbol.aio_get_company_isin(),
             )
         )
 
@@ -71,7 +75,7 @@ class SymbolShareHolderDataRow(BaseModel):
         if raw_data is None:
             raw_data = _core.get_symbol_shareholder_details(
                 shareholder_id=self.shareholder.id,
-                company_isin=self.shareholder._company_isin,
+                company_isin=self.shareholder._symbol.get_company_isin(),
             )
         raw_data = raw_data['chart']
         
@@ -84,6 +88,6 @@ class SymbolShareHolderDataRow(BaseModel):
         return self.get_chart_data(
             raw_data=await _core.aio_get_symbol_shareholder_details(
                 shareholder_id=self.shareholder.id,
-                company_isin=self.shareholder._company_isin,
+                company_isin=await self.shareholder._symbol.aio_get_company_isin(),
             )
         )
@@ -1,90 +1,154 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, Future
+from contextvars import copy_context
+from threading import Lock
+from typing import Iterable
+from weakref import WeakValueDictionary
+
 from . import _core
 from .group import SymbolGroupDataRow
 from .identification import SymbolIdDetails
 from .notification import SymbolNotificationsDataRow
 from .orderbook import SymbolOrderBookData, SymbolOrderBookDataRow
+from .profile import SymbolProfile, PROFILE_SECTIONS
 from .price import SymbolPriceOverview, SymbolIntraDayPriceChartDataRow, SymbolPriceData, SymbolDailyPriceDataRow
 from .shareholder import SymbolShareHolderDataRow, SymbolShareHolder
 from .state_change import SymbolStateChangeDataRow
 from .supervisor_message import SymbolSupervisorMessageDataRow
 from .traders_type import SymbolTradersTypeDataRow, SymbolTradersTypeInfo, SymbolTradersTypeSubInfo
+from ..utils import aio_build_models, shared_session, aio_shared_session
 
 
 class Symbol:
+    """
+    there is one shared instance per symbol id (Symbol(symbol_id) returns the same object while it is referenced),
+    so id details and company isin are resolved once for all code paths that use a symbol
+    """
+    
+    # weak references, instances nobody uses anymore are dropped with their id details
+    _instances: WeakValueDictionary[tuple[type, str], 'Symbol'] = WeakValueDictionary()
+    _instances_lock = Lock()
+    
+    def __new__(cls, symbol_id: str):
+        key = (cls, symbol_id)
+        with cls._instances_lock:
+            instance = cls._instances.get(key)
+            if instance is None:
+                # attributes are set here under the lock, __init__ runs again on every Symbol(symbol_id)
+                instance = super().__new__(cls)
+                instance.symbol_id = symbol_id
+                instance._company_isin = None
+                instance._id_details = None
+                instance._id_details_lock = Lock()
+                instance._id_details_future = None
+                instance._id_details_task = None
+                cls._instances[key] = instance
+            return instance
+    
     def __init__(self, symbol_id: str):
-        self.symbol_id = symbol_id
-        self._company_isin = None
+        pass
+    
+    def __reduce__(self):
+        # locks and tasks can not be pickled, the other side gets (or creates) its own shared instance
+        return type(self), (self.symbol_id,)
+    
+    @classmethod
+    def clear_instances(cls):
+        """
+        forgets shared instances (and their resolved id details)
+        """
+        
+        with cls._instances_lock:
+            cls._instances.clear()
+    
+    def clear_id_details(self):
+        """
+        forgets resolved id details (and company isin) of this symbol, so they are fetched again on the next use
+        """
+        
+        with self._id_details_lock:
+            self._id_details = None
+            self._company_isin = None
 
-    def get_price_overview(self, raw_data: dict = None) -> SymbolPriceOverview:
+    def get_price_overview(self, raw_data: dict = None, sections: Iterable[str] = None) -> SymbolPriceOverview:
         """
         gets the last price overview of the symbol and returns most of the information (in "dar yek negah" tab)
+        sections limits parsing to some of "price_data", "orderbook_data", "traders_type_data" and "group_data"
         """
         
         if raw_data is None:
-            raw_data = _core.get_symbol_price_overview(symbol_id=self.symbol_id)
+            raw_data = _core.get_symbol_price_overview(symbol_id=self.symbol_id, sections=sections)
         
-        tick = SymbolPriceData(
-            last=raw_data['price_data']['last'],
-            close=raw_data['price_data']['close'],
-            open=raw_data['price_data']['open'],
-            yesterday=raw_data['price_data']['yesterday'],
-            high=raw_data['price_data']['high'],
-            low=raw_data['price_data']['low'],
-            count=raw_data['price_data']['count'],
-            volume=raw_data['price_data']['volume'],
-            value=raw_data['price_data']['value'],
-        )
-
-        sell_rows = [SymbolOrderBookDataRow(
-            count=row['count'],
-            price=row['price'],
-            volume=row['volume'],
-        ) for row in raw_data['orderbook_data']['sell_rows']]
-        buy_rows = [SymbolOrderBookDataRow(
-            count=row['count'],
-            price=row['price'],
-            volume=row['volume'],
-        ) for row in raw_data['orderbook_data']['buy_rows']]
-        orderbook = SymbolOrderBookData(
-            sell_rows=sell_rows,
-            buy_rows=buy_rows,
-        )
-
-        traders_type = SymbolTradersTypeDataRow(
-            legal=SymbolTradersTypeInfo(
-                buy=SymbolTradersTypeSubInfo(
-                    count=raw_data['traders_type_data']['legal']['buy']['count'],
-                    volume=raw_data['traders_type_data']['legal']['buy']['volume'],
-                    value=raw_data['traders_type_data']['legal']['buy']['value'],
-                ),
-                sell=SymbolTradersTypeSubInfo(
-                    count=raw_data['traders_type_data']['legal']['sell']['count'],
-                    volume=raw_data['traders_type_data']['legal']['sell']['volume'],
-                    value=raw_data['traders_type_data']['legal']['sell']['value'],
+        tick = None
+        if 'price_data' in raw_data:
+            tick = SymbolPriceData(
+                last=raw_data['price_data']['last'],
+                close=raw_data['price_data']['close'],
+                open=raw_data['price_data']['open'],
+                yesterday=raw_data['price_data']['yesterday'],
+                high=raw_data['price_data']['high'],
+                low=raw_data['price_data']['low'],
+                count=raw_data['price_data']['count'],
+                volume=raw_data['price_data']['volume'],
+                value=raw_data['price_data']['value'],
+            )
+
+        orderbook = None
+        if 'orderbook_data' in raw_data:
+            sell_rows = [SymbolOrderBookDataRow(
+                count=row['count'],
+                price=row['price'],
+                volume=row['volume'],
+            ) for row in raw_data['orderbook_data']['sell_rows']]
+            buy_rows = [SymbolOrderBookDataRow(
+                count=row['count'],
+                price=row['price'],
+                volume=row['volume'],
+            ) for row in raw_data['orderbook_data']['buy_rows']]
+            orderbook = SymbolOrderBookData(
+                sell_rows=sell_rows,
+                buy_rows=buy_rows,
+            )
+
+        traders_type = None
+        if 'traders_type_data' in raw_data:
+            traders_type = SymbolTradersTypeDataRow(
+                legal=SymbolTradersTypeInfo(
+                    buy=SymbolTradersTypeSubInfo(
+                        count=raw_data['traders_type_data']['legal']['buy']['count'],
+                        volume=raw_data['traders_type_data']['legal']['buy']['volume'],
+                        value=raw_data['traders_type_data']['legal']['buy']['value'],
+                    ),
+                    sell=SymbolTradersTypeSubInfo(
+                        count=raw_data['traders_type_data']['legal']['sell']['count'],
+                        volume=raw_data['traders_type_data']['legal']['sell']['volume'],
+                        value=raw_data['traders_type_data']['legal']['sell']['value'],
+                    ),
                 ),
-            ),
-            real=SymbolTradersTypeInfo(
-                buy=SymbolTradersTypeSubInfo(
-                    count=raw_data['traders_type_data']['real']['buy']['count'],
-                    volume=raw_data['traders_type_data']['real']['buy']['volume'],
-                    value=raw_data['traders_type_data']['real']['buy']['value'],
-                ),
-                sell=SymbolTradersTypeSubInfo(
-                    count=raw_data['traders_type_data']['real']['sell']['count'],
-                    volume=raw_data['traders_type_data']['real']['sell']['volume'],
-                    value=raw_data['traders_type_data']['real']['sell']['value'],
+                real=SymbolTradersTypeInfo(
+                    buy=SymbolTradersTypeSubInfo(
+                        count=raw_data['traders_type_data']['real']['buy']['count'],
+                        volume=raw_data['traders_type_data']['real']['buy']['volume'],
+                        value=raw_data['traders_type_data']['real']['buy']['value'],
+                    ),
+                    sell=SymbolTradersTypeSubInfo(
+                        count=raw_data['traders_type_data']['real']['sell']['count'],
+                        volume=raw_data['traders_type_data']['real']['sell']['volume'],
+                        value=raw_data['traders_type_data']['real']['sell']['value'],
+                    ),
                 ),
-            ),
-        )
-
-        group_data = [SymbolGroupDataRow(
-            symbol_id=row['symbol_id'],
-            last=row['last'],
-            close=row['close'],
-            count=row['count'],
-            volume=row['volume'],
-            value=row['value'],
-        ) for row in raw_data['group_data']]
+            )
+
+        group_data = None
+        if 'group_data' in raw_data:
+            group_data = [SymbolGroupDataRow(
+                symbol_id=row['symbol_id'],
+                last=row['last'],
+                close=row['close'],
+                count=row['count'],
+                volume=row['volume'],
+                value=row['value'],
+            ) for row in raw_data['group_data']]
 
         return SymbolPriceOverview(
             price_data=tick,
@@ -183,14 +247,39 @@ class Symbol:
 
     def get_id_details(self, raw_data: dict = None) -> SymbolIdDetails:
         """
-        gets symbol identity details and returns all the information (in "shenase" tab)
+        gets symbol identity details and returns all the information (in "shenase" tab),
+        details are fetched once and shared by all users of this symbol
         """
 
-        if raw_data is None:
-            raw_data = _core.get_symbol_id_details(symbol_id=self.symbol_id)
-        if self._company_isin is None:
-            self._company_isin = raw_data['company_isin']
+        if raw_data is not None:
+            return self._set_id_details(raw_data=raw_data)
         
+        # the lock is only held to check and publish, concurrent first callers wait on the future of the one request
+        with self._id_details_lock:
+            if self._id_details is not None:
+                return self._id_details
+            
+            waiting = self._id_details_future
+            if waiting is None:
+                future = self._id_details_future = Future()
+        
+        if waiting is not None:
+            return waiting.result()
+        
+        try:
+            details = self._set_id_details(raw_data=_core.get_symbol_id_details(symbol_id=self.symbol_id))
+        except BaseException as ex:
+            future.set_exception(ex)
+            raise
+        else:
+            future.set_result(details)
+        finally:
+            with self._id_details_lock:
+                self._id_details_future = None
+        
+        return details
+    
+    def _set_id_details(self, raw_data: dict) -> SymbolIdDetails:
         details = SymbolIdDetails(
             isin=raw_data['isin'],
             short_isin=raw_data['short_isin'],
@@ -211,8 +300,24 @@ class Symbol:
             subgroup_code=raw_data['subgroup_code'],
             subgroup_name=raw_data['subgroup_name'],
         )
+        
+        with self._id_details_lock:
+            if self._company_isin is None:
+                self._company_isin = details.company_isin
+            self._id_details = details
 
         return details
+    
+    def get_company_isin(self) -> str:
+        """
+        returns isin of the company of the symbol (resolved from id details once)
+        """
+        
+        company_isin = self._company_isin
+        if company_isin is None:
+            company_isin = self.get_id_details().company_isin
+        
+        return company_isin
 
     def get_traders_type_history(self, raw_data: list[dict] = None) -> list[SymbolTradersTypeDataRow]:
         """
@@ -256,15 +361,13 @@ class Symbol:
         returns list of major shareholders (in "saham daran" tab)
         """
         if raw_data is None:
-            if self._company_isin is None:
-                self.get_id_details()
-            raw_data = _core.get_symbol_shareholders(company_isin=self._company_isin)
+            raw_data = _core.get_symbol_shareholders(company_isin=self.get_company_isin())
         else:
             raw_data = raw_data
         
         shareholders = [SymbolShareHolderDataRow(
             shareholder=SymbolShareHolder(
-                _company_isin=self._company_isin,
+                _symbol=self,
                 id=row['id'],
                 name=row['name'],
             ),
@@ -275,15 +378,63 @@ class Symbol:
         
         return shareholders
     
-    async def aio_get_price_overview(self) -> SymbolPriceOverview:
+    def get_profile(self, sections: Iterable[str] = None) -> SymbolProfile:
+        """
+        fetches all (or some of PROFILE_SECTIONS) sections of the symbol concurrently over shared connections,
+        company isin is resolved once for shareholders, a failing section is left as None and its exception is put in
+        errors
+        """
+        
+        sections = self._get_profile_sections(sections=sections)
+        with shared_session(), ThreadPoolExecutor(max_workers=len(sections)) as executor:
+            futures = {}
+            if 'id_details' in sections or ('shareholders_data' in sections and self._company_isin is None):
+                futures['id_details'] = executor.submit(copy_context().run, self.get_id_details)
+            
+            for section in sections:
+                if section == 'shareholders_data' and 'id_details' in futures:
+                    futures[section] = executor.submit(
+                        copy_context().run, self._get_shareholders_data_after, futures['id_details']
+                    )
+                elif section not in futures:
+                    futures[section] = executor.submit(copy_context().run, getattr(self, f'get_{section}'))
+        
+        data = {}
+        errors = {}
+        for section in sections:
+            try:
+                data[section] = futures[section].result()
+            except Exception as ex:
+                errors[section] = ex
+        
+        return SymbolProfile(symbol_id=self.symbol_id, errors=errors, **data)
+    
+    def _get_shareholders_data_after(self, id_details_future: Future) -> list[SymbolShareHolderDataRow]:
+        id_details_future.result()
+        return self.get_shareholders_data()
+    
+    @staticmethod
+    def _get_profile_sections(sections: Iterable[str] | None) -> list[str]:
+        if sections is None:
+            return list(PROFILE_SECTIONS)
+        
+        sections = list(dict.fromkeys(sections))
+        unknown = set(sections) - set(PROFILE_SECTIONS)
+        if unknown:
+            raise ValueError(f'unknown profile sections: {", ".join(sorted(unknown))}')
+        if not sections:
+            raise ValueError('at least one profile section should be requested')
+        
+        return sections
+    
+    async def aio_get_price_overview(self, sections: Iterable[str] = None) -> SymbolPriceOverview:
         return self.get_price_overview(
-            raw_data=await _core.aio_get_symbol_price_overview(symbol_id=self.symbol_id)
+            raw_data=await _core.aio_get_symbol_price_overview(symbol_id=self.symbol_id, sections=sections)
         )
     
     async def aio_get_intraday_price_chart_data(self) -> list[SymbolIntraDayPriceChartDataRow]:
-        return self.get_intraday_price_chart_data(
-            raw_data=await _core.aio_get_symbol_intraday_price_chart(symbol_id=self.symbol_id)
-        )
+        raw_data = await _core.aio_get_symbol_intraday_price_chart(symbol_id=self.symbol_id)
+        return await aio_build_models(self.get_intraday_price_chart_data, len(raw_data), raw_data=raw_data)
     
     async def aio_get_supervisor_messages_data(self) -> list[SymbolSupervisorMessageDataRow]:
         return self.get_supervisor_messages_data(
@@ -301,24 +452,74 @@ class Symbol:
         )
     
     async def aio_get_daily_history(self) -> list[SymbolDailyPriceDataRow]:
-        return self.get_daily_history(
-            raw_data=await _core.aio_get_symbol_daily_ticks_history(symbol_id=self.symbol_id)
-        )
+        raw_data = await _core.aio_get_symbol_daily_ticks_history(symbol_id=self.symbol_id)
+        return await aio_build_models(self.get_daily_history, len(raw_data), raw_data=raw_data)
     
     async def aio_get_id_details(self) -> SymbolIdDetails:
-        return self.get_id_details(
-            raw_data=await _core.aio_get_symbol_id_details(symbol_id=self.symbol_id)
-        )
+        if self._id_details is not None:
+            return self._id_details
+        
+        # concurrent first callers share one task, a failed (or another loop's) task is replaced by the next caller
+        task = self._id_details_task
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.create_task(self._aio_fetch_id_details())
+            self._id_details_task = task
+        
+        # shielded so a cancelled caller does not cancel the request of the others
+        return await asyncio.shield(task)
+    
+    async def _aio_fetch_id_details(self) -> SymbolIdDetails:
+        # the task is the per-instance future of async callers, the thread lock is only taken briefly to publish
+        try:
+            return self._set_id_details(
+                raw_data=await _core.aio_get_symbol_id_details(symbol_id=self.symbol_id)
+            )
+        finally:
+            if self._id_details_task is asyncio.current_task():
+                self._id_details_task = None
     
     async def aio_get_traders_type_history(self) -> list[SymbolTradersTypeDataRow]:
-        return self.get_traders_type_history(
-            raw_data=await _core.aio_get_symbol_traders_type_history(symbol_id=self.symbol_id)
-        )
+        raw_data = await _core.aio_get_symbol_traders_type_history(symbol_id=self.symbol_id)
+        return await aio_build_models(self.get_traders_type_history, len(raw_data), raw_data=raw_data)
     
-    async def aio_get_shareholders_data(self) -> list[SymbolShareHolderDataRow]:
-        if self._company_isin is None:
-            await self.aio_get_id_details()
+    async def aio_get_company_isin(self) -> str:
+        company_isin = self._company_isin
+        if company_isin is None:
+            company_isin = (await self.aio_get_id_details()).company_isin
         
+        return company_isin
+    
+    async def aio_get_shareholders_data(self) -> list[SymbolShareHolderDataRow]:
         return self.get_shareholders_data(
-            raw_data=await _core.aio_get_symbol_shareholders(company_isin=self._company_isin)
+            raw_data=await _core.aio_get_symbol_shareholders(company_isin=await self.aio_get_company_isin())
         )
+    
+    async def aio_get_profile(self, sections: Iterable[str] = None) -> SymbolProfile:
+        sections = self._get_profile_sections(sections=sections)
+        async with aio_shared_session():
+            tasks = {}
+            if 'id_details' in sections or ('shareholders_data' in sections and self._company_isin is None):
+                tasks['id_details'] = asyncio.create_task(self.aio_get_id_details())
+            
+            for section in sections:
+                if section == 'shareholders_data' and 'id_details' in tasks:
+                    tasks[section] = asyncio.create_task(self._aio_get_shareholders_data_after(tasks['id_details']))
+                elif section not in tasks:
+                    tasks[section] = asyncio.create_task(getattr(self, f'aio_get_{section}')())
+            
+            await asyncio.wait(tasks.values())
+        
+        data = {}
+        errors = {}
+        for section in sections:
+            ex = tasks[section].exception()
+            if ex is None:
+                data[section] = tasks[section].result()
+            else:
+                errors[section] = ex
+        
+        return SymbolProfile(symbol_id=self.symbol_id, errors=errors, **data)
+    
+    async def _aio_get_shareholders_data_after(self, id_details_task: asyncio.Task) -> list[SymbolShareHolderDataRow]:
+        await id_details_task
+        return await self.aio_get_shareholders_data()
@@ -1,14 +1,227 @@
+import asyncio
+from codecs import getincrementaldecoder
+from concurrent.futures import Executor
+from contextlib import contextmanager, asynccontextmanager
+from contextvars import ContextVar
 from copy import deepcopy
+from functools import lru_cache, partial
+from json import JSONDecoder, JSONDecodeError, loads
+from threading import Lock, local
+from typing import Iterable, Iterator, AsyncIterable, AsyncIterator
 
 from aiohttp import ClientSession
 from jdatetime import date as jdate, time as jtime
-from requests import request
+from requests import request, Session
 from requests.exceptions import HTTPError
 
+from .cache import ResponseCache, ValidatorCache, get_request_key
+
+_parse_executor: Executor | None = None
+_offload_executor: Executor | None = None
+_offload_min_payload_size: int | None = 1 << 20
+_offload_min_rows_count: int | None = 10000
+
+
+class _ThreadSessions:
+    # requests does not guarantee that a Session is thread safe, so each thread gets its own session
+    
+    def __init__(self):
+        self._local = local()
+        self._lock = Lock()
+        self._sessions = []
+    
+    def get(self) -> Session:
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = Session()
+            with self._lock:
+                self._sessions.append(session)
+        return session
+    
+    def close(self):
+        with self._lock:
+            sessions, self._sessions = self._sessions, []
+        for session in sessions:
+            session.close()
+
+
+# sessions shared by requests made inside shared_session() / aio_shared_session() blocks (including threads and tasks
+# started there with the same context)
+_session: ContextVar[_ThreadSessions | None] = ContextVar('_session', default=None)
+_aio_session: ContextVar[ClientSession | None] = ContextVar('_aio_session', default=None)
+
+_response_cache: ResponseCache | None = None
+_validator_cache: ValidatorCache | None = None
+
+
+def set_parse_executor(executor: Executor | None):
+    """
+    sets the executor that aio_* functions run parsers of large payloads (see set_offload_thresholds) on, e.g. a
+    ProcessPoolExecutor to parse on all cores while the event loop keeps downloading (None, the default, uses the
+    offload executor)
+    """
+    
+    global _parse_executor
+    _parse_executor = executor
+
+
+def get_parse_executor() -> Executor | None:
+    return _parse_executor
+
+
+def set_offload_thresholds(min_payload_size: int | None, min_rows_count: int | None, executor: Executor | None = None):
+    """
+    makes aio_* methods parse responses of at least min_payload_size characters (or bytes) and build models for at
+    least min_rows_count rows on executor (the event loop's default thread pool if None) instead of on the event loop
+    so it stays responsive (defaults are 1MB and 10000 rows on the default thread pool), None as a threshold keeps that
+    step on the event loop
+    """
+    
+    global _offload_executor, _offload_min_payload_size, _offload_min_rows_count
+    _offload_executor = executor
+    _offload_min_payload_size = min_payload_size
+    _offload_min_rows_count = min_rows_count
+
+
+async def _aio_run_in_executor(executor: Executor | None, func, kwargs: dict):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, partial(func, **kwargs))
+
+
+async def aio_run_parser(parser, payload_size: int = 0, /, **kwargs):
+    """
+    runs parser(**kwargs) on the parse executor (or the offload executor) when the payload is large, small payloads
+    are parsed on the event loop (parser and its arguments should be picklable for process pools)
+    """
+    
+    if _offload_min_payload_size is None or payload_size < _offload_min_payload_size:
+        return parser(**kwargs)
+    
+    executor = _offload_executor if _parse_executor is None else _parse_executor
+    return await _aio_run_in_executor(executor, parser, kwargs)
+
+
+def _run_json_parser(parser, text: str, key: str | None, kwargs: dict):
+    response = loads(text)
+    if key is not None:
+        response = response[key]
+    
+    return parser(response=response, **kwargs)
+
+
+async def aio_run_json_parser(parser, text: str, key: str = None, /, **kwargs):
+    """
+    like aio_run_parser for json responses, the body is decoded (and response[key] taken) where the parser runs, so
+    executors get the raw text instead of decoded objects
+    """
+    
+    return await aio_run_parser(_run_json_parser, len(text), parser=parser, text=text, key=key, kwargs=kwargs)
+
+
+async def aio_build_models(builder, rows_count: int, /, **kwargs):
+    """
+    runs builder(**kwargs) (a sync function converting raw data to models) off the event loop for many rows,
+    builder should not change any state since it may run on another thread (or process) concurrently with other calls
+    """
+    
+    if _offload_min_rows_count is not None and rows_count >= _offload_min_rows_count:
+        return await _aio_run_in_executor(_offload_executor, builder, kwargs)
+    
+    return builder(**kwargs)
+
+
+def set_response_cache(cache: ResponseCache | None):
+    """
+    caches GET responses of slowly changing endpoints (see ResponseCache) in safe_request and aio_safe_request,
+    None (the default) disables caching
+    """
+    
+    global _response_cache
+    _response_cache = cache
+
+
+def get_response_cache() -> ResponseCache | None:
+    return _response_cache
+
+
+def set_validator_cache(cache: ValidatorCache | None):
+    """
+    makes GET requests conditional (ETag/Last-Modified) and records bytes saved (see ValidatorCache),
+    None (the default) disables it
+    """
+    
+    global _validator_cache
+    _validator_cache = cache
+
+
+def get_validator_cache() -> ValidatorCache | None:
+    return _validator_cache
+
+
+@contextmanager
+def shared_session() -> Iterator[Session]:
+    """
+    makes requests inside the block reuse connections, each thread running in the block (with its context) uses its
+    own requests session, the yielded one is the session of the calling thread
+    """
+    
+    sessions = _ThreadSessions()
+    token = _session.set(sessions)
+    try:
+        yield sessions.get()
+    finally:
+        _session.reset(token)
+        sessions.close()
+
+
+@asynccontextmanager
+async def aio_shared_session() -> AsyncIterator[ClientSession]:
+    """
+    makes aio requests inside the block reuse the connections of one aiohttp session
+    """
+    
+    async with ClientSession() as session:
+        token = _aio_session.set(session)
+        try:
+            yield session
+        finally:
+            _aio_session.reset(token)
+
 
 def safe_request(method, url, timeout=20, **kwargs):
-    res = request(method.upper(), url, timeout=timeout, **kwargs)
+    if _response_cache is not None and method.upper() == 'GET':
+        return _response_cache.get(
+            key=get_request_key(method=method, url=url, params=kwargs.get('params')),
+            fetch=partial(_safe_request, method, url, timeout, **kwargs),
+        )
+    
+    return _safe_request(method, url, timeout, **kwargs)
+
+
+def _safe_request(method, url, timeout, **kwargs):
+    sessions = _session.get()
+    send = request if sessions is None else sessions.get().request
+    
+    validators = _validator_cache if method.upper() == 'GET' else None
+    if validators is None:
+        res = send(method.upper(), url, timeout=timeout, **kwargs)
+        res.raise_for_status()
+        return res
+    
+    key = get_request_key(method=method, url=url, params=kwargs.get('params'))
+    kwargs['headers'] = validators.get_request_headers(key=key, headers=kwargs.get('headers'))
+    res = send(method.upper(), url, timeout=timeout, **kwargs)
+    if res.status_code == 304:
+        cached = validators.get_not_modified_response(key=key)
+        if cached is not None:
+            return cached
+        # the cached response was evicted meanwhile, ask for the full body again
+        kwargs['headers'].pop('If-None-Match', None)
+        kwargs['headers'].pop('If-Modified-Since', None)
+        res = send(method.upper(), url, timeout=timeout, **kwargs)
+    
     res.raise_for_status()
+    validators.store(key=key, response=res, body_size=len(res.content))
     return res
 
 
@@ -18,14 +231,64 @@ async def aio_safe_request(method, url, timeout=20, **kwargs):
     else:
         kwargs.setdefault('ssl', True)
     
-    async with ClientSession() as session:
+    if _response_cache is not None and method.upper() == 'GET':
+        return await _response_cache.aio_get(
+            key=get_request_key(method=method, url=url, params=kwargs.get('params')),
+            fetch=partial(_aio_safe_request, method, url, timeout, **kwargs),
+        )
+    
+    return await _aio_safe_request(method, url, timeout, **kwargs)
+
+
+async def _aio_safe_request(method, url, timeout, **kwargs):
+    session = _aio_session.get()
+    # background refreshes of cached responses may outlive the shared session they were started in
+    if session is None or session.closed:
+        async with ClientSession() as session:
+            response = await _aio_send_request(session, method, url, timeout, **kwargs)
+    else:
+        response = await _aio_send_request(session, method, url, timeout, **kwargs)
+    
+    _aio_raise_for_status(response=response)
+    
+    return response
+
+
+async def _aio_send_request(session: ClientSession, method, url, timeout, **kwargs):
+    validators = _validator_cache if method.upper() == 'GET' else None
+    if validators is None:
+        return await _aio_read_response(session, method, url, timeout, **kwargs)
+    
+    key = get_request_key(method=method, url=url, params=kwargs.get('params'))
+    kwargs['headers'] = validators.get_request_headers(key=key, headers=kwargs.get('headers'))
+    response = await _aio_read_response(session, method, url, timeout, **kwargs)
+    if response.status == 304:
+        cached = validators.get_not_modified_response(key=key)
+        if cached is not None:
+            return cached
+        # the cached response was evicted meanwhile, ask for the full body again
+        kwargs['headers'].pop('If-None-Match', None)
+        kwargs['headers'].pop('If-Modified-Since', None)
+        response = await _aio_read_response(session, method, url, timeout, **kwargs)
+    
+    if response.status < 400:
         # noinspection PyProtectedMember
-        response = await session._request(method.upper(), url, timeout=timeout, **kwargs)
-        response.text = await response.text()
-        response.close()
+        validators.store(key=key, response=response, body_size=len(response._body or b''))
     
+    return response
+
+
+async def _aio_read_response(session: ClientSession, method, url, timeout, **kwargs):
+    # noinspection PyProtectedMember
+    response = await session._request(method.upper(), url, timeout=timeout, **kwargs)
+    response.text = await response.text()
+    response.close()
+    return response
+
+
+def _aio_raise_for_status(response):
     response.status_code = response.status
-    
+
     # region raise_for_status()
     http_error_msg = ""
     if isinstance(response.reason, bytes):
@@ -39,22 +302,199 @@ async def aio_safe_request(method, url, timeout=20, **kwargs):
             reason = response.reason.decode("iso-8859-1")
     else:
         reason = response.reason
-    
+
     if 400 <= response.status_code < 500:
         http_error_msg = (
             f"{response.status_code} Client Error: {reason} for url: {response.url}"
         )
-    
+
     elif 500 <= response.status_code < 600:
         http_error_msg = (
             f"{response.status_code} Server Error: {reason} for url: {response.url}"
         )
-    
+
     if http_error_msg:
         raise HTTPError(http_error_msg, response=response)
     # endregion
+
+
+def stream_request(method, url, timeout=20, chunk_size=65536, **kwargs) -> Iterator[bytes]:
+    """
+    yields the response body in chunks as it is downloaded, the request goes through the session of the enclosing
+    shared_session() block (if any), streamed bodies are never cached
+    """
     
-    return response
+    sessions = _session.get()
+    send = request if sessions is None else sessions.get().request
+    
+    with send(method.upper(), url, timeout=timeout, stream=True, **kwargs) as res:
+        res.raise_for_status()
+        yield from res.iter_content(chunk_size=chunk_size)
+
+
+async def aio_stream_request(method, url, timeout=20, chunk_size=65536, **kwargs) -> AsyncIterator[bytes]:
+    """
+    yields the response body in chunks as it is downloaded, the request goes through the session of the enclosing
+    aio_shared_session() block (if any), streamed bodies are never cached
+    """
+    
+    if 'verify' in kwargs:
+        kwargs['ssl'] = kwargs.pop('verify')
+    else:
+        kwargs.setdefault('ssl', True)
+    
+    session = _aio_session.get()
+    if session is None or session.closed:
+        async with ClientSession() as session:
+            async for chunk in _aio_stream_response(session, method, url, timeout, chunk_size, **kwargs):
+                yield chunk
+    else:
+        async for chunk in _aio_stream_response(session, method, url, timeout, chunk_size, **kwargs):
+            yield chunk
+
+
+async def _aio_stream_response(session: ClientSession, method, url, timeout, chunk_size, **kwargs) -> AsyncIterator[bytes]:
+    async with session.request(method.upper(), url, timeout=timeout, **kwargs) as response:
+        _aio_raise_for_status(response=response)
+        async for chunk in response.content.iter_chunked(chunk_size):
+            yield chunk
+
+
+class JsonArrayItemsParser:
+    """
+    incrementally parses items of the json array stored under `key` from chunks of a json document
+    (only the unparsed tail of the document is kept in memory)
+    """
+    
+    def __init__(self, key: str):
+        self._key = f'"{key}"'
+        self._decoder = JSONDecoder()
+        self._text_decoder = getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._in_array = False
+        self._finished = False
+        # state of the scan for the array before it is found
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._key_state = 0  # 1: `"key"` was seen as an object key, 2: its `:` was seen too
+        self._scan_pos = 0
+    
+    def feed(self, chunk: bytes) -> list:
+        if self._finished:
+            return []
+        
+        self._buffer += self._text_decoder.decode(chunk)
+        
+        if not self._in_array and not self._find_array():
+            return []
+        
+        items = []
+        pos = 0
+        buffer = self._buffer
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                pos += 1
+            
+            if pos == len(buffer):
+                break
+            
+            if buffer[pos] == ']':
+                self._finished = True
+                break
+            
+            start = pos
+            try:
+                item, pos = self._decoder.raw_decode(buffer, pos)
+            except JSONDecodeError:
+                # the item is not completely downloaded yet
+                break
+            
+            # a number (or literal) is complete only when a delimiter follows it, it may continue in the next chunk
+            if buffer[start] not in '{["' and (pos == len(buffer) or buffer[pos] not in ' \t\r\n,]'):
+                pos = start
+                break
+            
+            items.append(item)
+        
+        self._buffer = buffer[pos:]
+        return items
+    
+    def _find_array(self) -> bool:
+        """
+        scans the buffer for `"key": [` as a key of the top level object, strings are skipped so the key is not
+        matched inside values
+        """
+        
+        buffer = self._buffer
+        string_start = 0
+        pos = self._scan_pos
+        while pos < len(buffer):
+            c = buffer[pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == '\\':
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    is_key = self._depth == 1 and buffer[string_start:pos + 1] == self._key
+                    self._key_state = 1 if is_key else 0
+            elif c in ' \t\r\n':
+                pass
+            elif c == '"':
+                self._in_string = True
+                string_start = pos
+            elif c == ':' and self._key_state == 1:
+                self._key_state = 2
+            elif c == '[' and self._key_state == 2:
+                self._buffer = buffer[pos + 1:]
+                self._in_array = True
+                return True
+            else:
+                self._key_state = 0
+                if c in '{[':
+                    self._depth += 1
+                elif c in '}]':
+                    self._depth -= 1
+            pos += 1
+        
+        # only an unfinished string is needed to continue the scan
+        self._buffer = buffer[string_start:] if self._in_string else ''
+        self._scan_pos = len(self._buffer)
+        return False
+    
+    def close(self):
+        if not self._finished:
+            raise ValueError(f'json document ended before array {self._key} was completely parsed')
+
+
+def iter_json_array_items(chunks: Iterable[bytes], key: str) -> Iterator:
+    parser = JsonArrayItemsParser(key=key)
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    parser.close()
+
+
+async def aio_iter_json_array_items(chunks: AsyncIterable[bytes], key: str) -> AsyncIterator:
+    parser = JsonArrayItemsParser(key=key)
+    async for chunk in chunks:
+        for item in parser.feed(chunk):
+            yield item
+    parser.close()
+
+
+def import_numpy():
+    """
+    imports numpy (an optional dependency, only needed by the to_numpy/get_array helpers)
+    """
+    
+    try:
+        import numpy
+    except ImportError as ex:
+        raise ImportError('numpy is needed for numpy arrays, install it with "pip install tsetmc-api[numpy]"') from ex
+    
+    return numpy
 
 
 def deep_update(d1: dict, d2: dict) -> dict:
@@ -72,17 +512,46 @@ def deep_update(d1: dict, d2: dict) -> dict:
 
 
 def convert_heven_to_jtime(heven: int) -> jtime:
-    heven = str(heven)
-    if len(heven) == 6:
-        return jtime(hour=int(heven[:2]), minute=int(heven[2:4]), second=int(heven[4:]))
-    else:
-        return jtime(hour=int(heven[:1]), minute=int(heven[1:3]), second=int(heven[3:]))
+    minutes, second = divmod(int(heven), 100)
+    hour, minute = divmod(minutes, 100)
+    return jtime(hour=hour, minute=minute, second=second)
 
 
+def convert_jtime_to_heven(t: jtime) -> int:
+    return t.hour * 10000 + t.minute * 100 + t.second
+
+
+@lru_cache(maxsize=4096)
 def convert_deven_to_jdate(deven: int) -> jdate:
-    deven = str(deven)
-    return jdate.fromgregorian(
-        year=int(deven[:4]),
-        month=int(deven[4:6]),
-        day=int(deven[6:]),
-    )
+    year, month_day = divmod(int(deven), 10000)
+    month, day = divmod(month_day, 100)
+    return jdate.fromgregorian(year=year, month=month, day=day)
+
+
+def convert_jdate_to_deven(date: jdate) -> int:
+    g = date.togregorian()
+    return g.year * 10000 + g.month * 100 + g.day
+
+
+def convert_hevens_to_jtimes(hevens: Iterable[int]) -> list[jtime]:
+    """
+    converts a whole column of heven values, building each distinct time only once
+    """
+
+    cache = {}
+    result = []
+    for heven in hevens:
+        t = cache.get(heven)
+        if t is None:
+            t = cache[heven] = convert_heven_to_jtime(heven=heven)
+        result.append(t)
+
+    return result
+
+
+def convert_devens_to_jdates(devens: Iterable[int]) -> list[jdate]:
+    """
+    converts a whole column of deven values (cached across calls, the set of trading days is small)
+    """
+
+    return [convert_deven_to_jdate(deven=int(deven)) for deven in devens]
@@ -0,0 +1,45 @@
+import json
+
+import pytest
+from jdatetime import date as jdate
+
+from tsetmc_api.day_details import _core
+
+
+def _row(heven: int, number: int, price: int) -> dict:
+    return {
+        'hEven': heven,
+        'number': number,
+        'qTitMeDem': 10,
+        'zOrdMeDem': 1,
+        'pMeDem': price,
+        'pMeOf': price + 10,
+        'zOrdMeOf': 2,
+        'qTitMeOf': 20,
+    }
+
+
+def _chunks(rows: list[dict]) -> list[bytes]:
+    payload = json.dumps({'bestLimitsHistory': rows}).encode()
+    return [payload[i:i + 7] for i in range(0, len(payload), 7)]
+
+
+def _iter_deltas(rows: list[dict]) -> list[dict]:
+    return list(_core.iter_day_details_orderbook_deltas(symbol_id='1', date=jdate(1402, 1, 5), chunks=_chunks(rows)))
+
+
+@pytest.mark.parametrize('rows', [
+    [_row(90000, 2, 100), _row(90000, 1, 101), _row(90001, 1, 102), _row(90002, 3, 103), _row(90002, 1, 104)],
+    [_row(90002, 3, 103), _row(90002, 1, 104), _row(90001, 1, 102), _row(90000, 1, 101), _row(90000, 2, 100)],
+])
+def test_iter_orderbook_deltas_matches_list_order(rows):
+    deltas = _iter_deltas(rows)
+    expected = _core.get_day_details_orderbook_deltas(symbol_id='1', date=jdate(1402, 1, 5), response=rows)
+    assert deltas == expected
+    assert [list(delta['buy_rows']) for delta in deltas] == [list(delta['buy_rows']) for delta in expected]
+
+
+def test_iter_orderbook_deltas_rejects_unordered_rows():
+    rows = [_row(90000, 1, 100), _row(90001, 1, 101), _row(90000, 2, 102)]
+    with pytest.raises(ValueError):
+        _iter_deltas(rows)
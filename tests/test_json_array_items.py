@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+
+from tsetmc_api.utils import JsonArrayItemsParser, iter_json_array_items, aio_iter_json_array_items
+
+
+def _split(payload: bytes, *indexes: int) -> list[bytes]:
+    bounds = [0, *indexes, len(payload)]
+    return [payload[start:end] for start, end in zip(bounds, bounds[1:])]
+
+
+@pytest.mark.parametrize('index', range(1, len(b'{"k": [12345, 678]}')))
+def test_items_split_at_any_chunk_boundary(index):
+    chunks = _split(b'{"k": [12345, 678]}', index)
+    assert list(iter_json_array_items(chunks=chunks, key='k')) == [12345, 678]
+
+
+@pytest.mark.parametrize('index', range(1, len(b'{"k":[1.5,true,null,-2e3,"a,]"]}')))
+def test_scalars_split_at_any_chunk_boundary(index):
+    chunks = _split(b'{"k":[1.5,true,null,-2e3,"a,]"]}', index)
+    assert list(iter_json_array_items(chunks=chunks, key='k')) == [1.5, True, None, -2000.0, 'a,]']
+
+
+def test_items_fed_byte_by_byte():
+    payload = '{"k": [{"a": 1, "b": [2, 3]}, {"a": "سلام"}]}'.encode()
+    chunks = [payload[i:i + 1] for i in range(len(payload))]
+    assert list(iter_json_array_items(chunks=chunks, key='k')) == [{'a': 1, 'b': [2, 3]}, {'a': 'سلام'}]
+
+
+def test_key_is_anchored_to_top_level_object_keys():
+    payload = b'{"note": "\\"k\\": [9]", "other": {"k": [8]}, "list": ["k", [7]], "k" : [1, 2]}'
+    for index in range(1, len(payload)):
+        assert list(iter_json_array_items(chunks=_split(payload, index), key='k')) == [1, 2]
+
+
+def test_unfinished_array_raises_on_close():
+    parser = JsonArrayItemsParser(key='k')
+    assert parser.feed(b'{"k": [1, 2') == [1]
+    with pytest.raises(ValueError):
+        parser.close()
+
+
+def test_aio_items_split_at_chunk_boundary():
+    async def chunks():
+        for chunk in _split(b'{"k": [12345, 678]}', 8, 15):
+            yield chunk
+
+    async def collect():
+        return [item async for item in aio_iter_json_array_items(chunks=chunks(), key='k')]
+
+    assert asyncio.run(collect()) == [12345, 678]
@@ -0,0 +1,53 @@
+import pytest
+
+from tsetmc_api.market_watch import _core
+
+# enough symbols for the bytes parsers to cut the body into several blocks
+_SYMBOLS_COUNT = 3000
+
+
+def _price_data_response() -> str:
+    prices = ';'.join(
+        f'{i},IRO1X{i:05},s{i},full name {i},{90000 + i % 500},100,101,102,3,400,40000,99,103,100,{i if i % 3 else ""},'
+        f'1000,5,1,{i % 40},110.0,90.0,0,10'
+        for i in range(_SYMBOLS_COUNT)
+    )
+    orderbook = ';'.join(f'{i % (_SYMBOLS_COUNT + 5)},{rank},1,2,100,101,30,40' for i in range(0, 4000, 3) for rank in (1, 2))
+    return f'0@1@{prices}@{orderbook}@123456'
+
+
+def _daily_history_response() -> str:
+    rows = []
+    for i in range(_SYMBOLS_COUNT // 3):
+        for day in range(3):
+            prefix = f'{i},' if day == 0 else ''
+            rows.append(f'{prefix}{day},100,101,3,400,40000,99,103,100,{100 + day}')
+    return ';'.join(rows) + ';'
+
+
+def _stats_response() -> str:
+    rows = ['5,7', '6,8.5']  # orphan rows before the first symbol
+    for i in range(_SYMBOLS_COUNT):
+        rows.append(f'{i},1,{i * 1000}')
+        rows.append(f'2,{i}.5')
+        rows.append(f'89,{i}.0')
+        rows.append(f'90,{2 ** 53 + i}')
+    return ';'.join(rows)
+
+
+@pytest.mark.parametrize('parser, response', [
+    (_core.get_watch_price_data, _price_data_response()),
+    (_core.get_watch_daily_history_data, _daily_history_response()),
+    (_core.get_watch_raw_stats_data, _stats_response()),
+    (_core.get_watch_stats_matrix_data, _stats_response()),
+])
+def test_bytes_parser_matches_text_parser(parser, response):
+    assert len(response) > 1 << 16
+    text_result = parser(response=response)
+    bytes_result = parser(response=response.encode())
+    assert repr(bytes_result) == repr(text_result)
+
+
+def test_raw_stats_skip_orphan_rows():
+    for response in ('5,7;1,1,2;2,3.5', b'5,7;1,1,2;2,3.5'):
+        assert _core.get_watch_raw_stats_data(response=response) == {'1': {1: 2, 2: 3.5}}
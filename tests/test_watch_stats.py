@@ -0,0 +1,27 @@
+from tsetmc_api.market_watch import _core
+from tsetmc_api.market_watch.stats import WatchStatsMatrix
+
+_RESPONSE = '111,1,9007199254740993;2,12.0;3,1.5;4,7;222,4,0;5,2.25'
+
+
+def _matrix(response: str | bytes) -> WatchStatsMatrix:
+    symbol_ids, values, int_values, int_mask = _core.get_watch_stats_matrix_data(response=response)
+    return WatchStatsMatrix(symbol_ids=symbol_ids, values=values, int_values=int_values, int_mask=int_mask)
+
+
+def test_stats_data_keeps_exact_values_and_types():
+    raw_stats = _core.get_watch_raw_stats_data(response=_RESPONSE)
+    for response in (_RESPONSE, _RESPONSE.encode()):
+        stats_data = _matrix(response).get_stats_data()
+        assert stats_data == _core.get_watch_stats_data(raw_stats=raw_stats)
+        for symbol_id, stats in raw_stats.items():
+            for index, value in stats.items():
+                sub_name, name = _core.STATS_INDEX_NAMES[index]
+                assert type(stats_data[symbol_id][sub_name][name]) is type(value)
+
+
+def test_get_value():
+    matrix = _matrix(_RESPONSE.encode())
+    assert matrix.get_value('111', 1) == 9007199254740993
+    assert matrix.get_value('111', 2) == 12.0 and isinstance(matrix.get_value('111', 2), float)
+    assert matrix.get_value('222', 1) is None